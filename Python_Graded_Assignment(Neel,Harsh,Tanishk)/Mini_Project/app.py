@@ -1,9 +1,16 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import numpy as np
+from urbanmart_data import load_sales_data
+from urbanmart_filters import FilterCache, build_bitmap_index, count_rows
+from urbanmart_aggregates import (
+    build_cube, cube_totals, cube_group, daily_rollup, time_rollup,
+    AggregationPlan, top_k, bottom_k,
+    build_distinct_sketches, approx_distinct, approx_distinct_by, hll_error, HLL_PRECISION
+)
+from urbanmart_timing import SectionTimer, log_timings, TIMING_LOG
 
 # ============================================
 # PAGE CONFIGURATION
@@ -16,6 +23,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Wall time and rows in/out of each section of this render
+timer = SectionTimer()
+
 # ============================================
 # CUSTOM CSS
 # ============================================
@@ -72,34 +82,19 @@ st.markdown("""
 # DATA LOADING FUNCTION
 # ============================================
 
-@st.cache_data
+@st.cache_resource
 def load_data():
-    """Load and prepare the data"""
+    """
+    Load and prepare the data. The frame is shared by every session and
+    rerun as-is (st.cache_data would unpickle a full copy on each rerun),
+    so it must be treated as read-only: filters return slices of it or the
+    frame itself, and aggregations work on shallow copies.
+    """
     try:
-        df = pd.read_csv("urbanmart_sales.csv")
-        
-        # Create calculated columns
-        df['line_revenue'] = (df['quantity'] * df['unit_price']) - df['discount_applied']
-        df['gross_revenue'] = df['quantity'] * df['unit_price']
-        df['total_discount'] = df['discount_applied']
-        
-        # Assume 30% cost of goods sold for profit calculation
-        df['cost'] = df['quantity'] * df['unit_price'] * 0.30
-        df['profit'] = df['line_revenue'] - df['cost']
-        df['profit_margin'] = (df['profit'] / df['line_revenue'] * 100).round(2)
-        
-        # Convert date to datetime
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Extract time components
-        df['day_of_week'] = df['date'].dt.day_name()
-        df['week'] = df['date'].dt.isocalendar().week
-        df['month'] = df['date'].dt.month
-        df['month_name'] = df['date'].dt.strftime('%B')
-        df['quarter'] = df['date'].dt.quarter
-        df['year'] = df['date'].dt.year
-        df['year_month'] = df['date'].dt.to_period('M').astype(str)
-        df['year_quarter'] = df['date'].dt.to_period('Q').astype(str)
+        # Base columns come from the Arrow cache when the CSV is unchanged
+        # (derived columns are computed on demand by the aggregations);
+        # dimensions are categoricals so groupby/isin work on integer codes
+        df = load_sales_data("urbanmart_sales.csv", typed=True)
         
         return df
     
@@ -112,70 +107,61 @@ def load_data():
         st.error(f"❌ **Error loading data:** {e}")
         st.stop()
 
+@st.cache_resource
+def load_filter_index():
+    """Build the bitmap index for the sidebar filter dimensions (once per dataset)"""
+    return build_bitmap_index(load_data())
+
+@st.cache_resource
+def load_cube():
+    """Day x dimensions cube of the additive measures (once per dataset)"""
+    return build_cube(load_data())
+
+@st.cache_resource
+def load_distinct_sketches():
+    """HyperLogLog sketches per cube cell for transaction_id and customer_id"""
+    return build_distinct_sketches(load_data())
+
+@st.cache_resource
+def get_filter_cache(frame="rows"):
+    """Filter results shared across reruns (row positions, LRU-bounded), one cache per frame"""
+    return FilterCache(max_entries=64, max_bytes=256 * 1024 * 1024)
+
 # ============================================
 # ADVANCED FILTER FUNCTION
 # ============================================
 
 def apply_filters(df, date_segment, custom_start, custom_end, stores, channel, categories, segments, payment_methods):
-    """Apply all filters to the dataframe"""
-    
-    filtered_df = df.copy()
-    
-    # Date filtering based on segment
-    if date_segment == "Daily":
-        # Use custom date range
-        filtered_df = filtered_df[
-            (filtered_df['date'] >= pd.to_datetime(custom_start)) & 
-            (filtered_df['date'] <= pd.to_datetime(custom_end))
-        ]
-    elif date_segment == "Weekly":
-        # Group by week
-        filtered_df = filtered_df[
-            (filtered_df['date'] >= pd.to_datetime(custom_start)) & 
-            (filtered_df['date'] <= pd.to_datetime(custom_end))
-        ]
-    elif date_segment == "Monthly":
-        # Filter by selected months
-        filtered_df = filtered_df[
-            (filtered_df['date'] >= pd.to_datetime(custom_start)) & 
-            (filtered_df['date'] <= pd.to_datetime(custom_end))
-        ]
-    elif date_segment == "Quarterly":
-        # Filter by quarters
-        filtered_df = filtered_df[
-            (filtered_df['date'] >= pd.to_datetime(custom_start)) & 
-            (filtered_df['date'] <= pd.to_datetime(custom_end))
-        ]
-    elif date_segment == "Yearly":
-        # Filter by years
-        filtered_df = filtered_df[
-            (filtered_df['date'] >= pd.to_datetime(custom_start)) & 
-            (filtered_df['date'] <= pd.to_datetime(custom_end))
-        ]
-    
-    # Other filters
-    if stores:
-        filtered_df = filtered_df[filtered_df['store_location'].isin(stores)]
-    
-    if channel != "All":
-        filtered_df = filtered_df[filtered_df['channel'] == channel]
-    
-    if categories:
-        filtered_df = filtered_df[filtered_df['product_category'].isin(categories)]
-    
-    if segments:
-        filtered_df = filtered_df[filtered_df['customer_segment'].isin(segments)]
-    
-    if payment_methods:
-        filtered_df = filtered_df[filtered_df['payment_method'].isin(payment_methods)]
-    
-    return filtered_df
+    """
+    Apply all filters to the dataframe.
+    Every predicate goes into one combined mask and the result is
+    materialised once; date_segment only changes the trend grain, not the rows.
+    Results are cached by the normalised filter state, so page switches and
+    repeated selections reuse the same rows.
+    """
+    return get_filter_cache("rows").filter_frame(
+        df, custom_start, custom_end,
+        stores=stores, channel=channel, categories=categories,
+        segments=segments, payment_methods=payment_methods,
+        bitmap_index=load_filter_index()
+    )
+
+def count_filtered(df, custom_start, custom_end, stores, channel, categories, segments, payment_methods):
+    """Count the rows the filters keep, straight from the bitmap index"""
+    return count_rows(
+        df, custom_start, custom_end,
+        stores=stores, channel=channel, categories=categories,
+        segments=segments, payment_methods=payment_methods,
+        bitmap_index=load_filter_index()
+    )
 
 # ============================================
 # LOAD DATA
 # ============================================
 
-df = load_data()
+with timer.section("load data") as timing:
+    df = load_data()
+    timing['rows_out'] = len(df)
 
 # ============================================
 # SIDEBAR - NAVIGATION & FILTERS
@@ -296,20 +282,86 @@ selected_payment_methods = st.sidebar.multiselect(
     default=all_payment_methods
 )
 
-st.sidebar.markdown("---")
-
-# Apply filters
-df_filtered = apply_filters(
-    df, date_segment, start_date, end_date, 
-    selected_stores, channel_filter, selected_categories,
-    selected_segments, selected_payment_methods
+st.sidebar.markdown("### ⚡ Performance")
+approximate_counts = st.sidebar.checkbox(
+    "Approximate distinct counts",
+    value=False,
+    help="Count transactions and customers from mergeable HyperLogLog sketches instead of exact counts"
+)
+count_help = None
+if approximate_counts:
+    count_help = f"HyperLogLog estimate (p={HLL_PRECISION}), typical error ±{hll_error():.1%}"
+    st.sidebar.caption(f"≈ Distinct counts are estimates, typical error ±{hll_error():.1%}")
+show_timings = st.sidebar.checkbox(
+    "Show timing panel",
+    value=False,
+    help=f"Time each section of the page (wall time, rows in/out) and append it to {TIMING_LOG}"
 )
 
-# Check if data exists
-if len(df_filtered) == 0:
+st.sidebar.markdown("---")
+
+# Check if data exists (counted from the bitmaps, before materialising rows)
+with timer.section("count filtered rows", rows_in=len(df)) as timing:
+    selected_rows = count_filtered(
+        df, start_date, end_date,
+        selected_stores, channel_filter, selected_categories,
+        selected_segments, selected_payment_methods
+    )
+    timing['rows_out'] = selected_rows
+if selected_rows == 0:
     st.warning("⚠️ No data available for selected filters. Please adjust your criteria.")
     st.stop()
 
+# Apply filters
+with timer.section("apply filters", rows_in=len(df)) as timing:
+    df_filtered = apply_filters(
+        df, date_segment, start_date, end_date, 
+        selected_stores, channel_filter, selected_categories,
+        selected_segments, selected_payment_methods
+    )
+    timing['rows_out'] = len(df_filtered)
+
+# Same filters on the cube - additive breakdowns are answered from here,
+# so their cost depends on distinct combinations, not on transactions
+with timer.section("filter cube") as timing:
+    cube = load_cube()
+    timing['rows_in'] = len(cube)
+    cube_filtered = get_filter_cache("cube").filter_frame(
+        cube, start_date, end_date,
+        stores=selected_stores, channel=channel_filter, categories=selected_categories,
+        segments=selected_segments, payment_methods=selected_payment_methods
+    )
+    cube_kpis = cube_totals(cube_filtered)
+    timing['rows_out'] = len(cube_filtered)
+
+# Row-level aggregations go through one plan per render: requests on the
+# same keys share a single groupby pass
+plan = AggregationPlan(df_filtered, timer if show_timings else None)
+
+def distinct_count(column):
+    """Exact distinct count over the filtered rows, or the HLL estimate in approximate mode"""
+    if approximate_counts:
+        cells = cube_filtered.index.to_numpy()
+        return int(round(approx_distinct(load_distinct_sketches()[column], cells)))
+    return df_filtered[column].nunique()
+
+def grouped_metrics(keys, spec):
+    """
+    plan.agg(keys, spec) for sums and distinct counts over a cube dimension.
+    In approximate mode the sums come from the cube and the distinct counts
+    from merged HLL sketches, so no row-level data is scanned.
+    """
+    if not approximate_counts:
+        return plan.agg(keys, spec)
+    sums = [column for column, func in spec.items() if func == 'sum']
+    result = cube_group(cube_filtered, keys, sums).set_index(keys)
+    cells = cube_filtered.index.to_numpy()
+    for column, func in spec.items():
+        if func == 'nunique':
+            estimate = approx_distinct_by(load_distinct_sketches()[column], cells, cube_filtered[keys].to_numpy())
+            result[column] = estimate.reindex(result.index).round().astype(int)
+    return result[list(spec)]
+
 # ============================================
 # HELPER FUNCTIONS FOR INSIGHTS
 # ============================================
@@ -355,6 +407,20 @@ def create_insight_box(title, content, insight_type="info"):
         </div>
     """, unsafe_allow_html=True)
 
+def render_chart(fig):
+    """st.plotly_chart at full width, timed as the current block's rendering"""
+    with timer.render():
+        st.plotly_chart(fig, use_container_width=True)
+
+def render_table(data, **kwargs):
+    """st.dataframe, timed as the current block's rendering"""
+    with timer.render():
+        st.dataframe(data, **kwargs)
+
+# The whole page body is one section (rows in = filtered rows); each chart
+# or table block inside it is timed separately via timer.block()
+page_timing = timer.start(f"page: {page}", rows_in=len(df_filtered))
+
 # ============================================
 # PAGE 1: EXECUTIVE OVERVIEW
 # ============================================
@@ -365,14 +431,15 @@ if page == "🏠 Executive Overview":
     st.markdown(f'<p class="sub-header">Period: {start_date} to {end_date} | View: {date_segment}</p>', unsafe_allow_html=True)
     
     # Key Metrics Row
+    timer.block("Overview: KPIs")
     st.markdown('<div class="section-header"><h2>📊 Key Performance Indicators</h2></div>', unsafe_allow_html=True)
     
     col1, col2, col3, col4, col5 = st.columns(5)
     
-    total_revenue = df_filtered['line_revenue'].sum()
-    total_profit = df_filtered['profit'].sum()
-    total_transactions = df_filtered['transaction_id'].nunique()
-    unique_customers = df_filtered['customer_id'].nunique()
+    total_revenue = cube_kpis['line_revenue']
+    total_profit = cube_kpis['profit']
+    total_transactions = distinct_count('transaction_id')
+    unique_customers = distinct_count('customer_id')
     avg_order_value = total_revenue / total_transactions if total_transactions > 0 else 0
     
     with col1:
@@ -394,14 +461,16 @@ if page == "🏠 Executive Overview":
         st.metric(
             label="🧾 Transactions",
             value=f"{total_transactions:,}",
-            delta=None
+            delta=None,
+            help=count_help
         )
     
     with col4:
         st.metric(
             label="👥 Customers",
             value=f"{unique_customers:,}",
-            delta=None
+            delta=None,
+            help=count_help
         )
     
     with col5:
@@ -414,44 +483,19 @@ if page == "🏠 Executive Overview":
     st.markdown("---")
     
     # Revenue Trend
+    timer.block("Overview: revenue trend")
     st.markdown('<div class="section-header"><h2>📈 Revenue & Profit Trend</h2></div>', unsafe_allow_html=True)
     
-    if date_segment == "Daily":
-        trend_data = df_filtered.groupby('date').agg({
-            'line_revenue': 'sum',
-            'profit': 'sum'
-        }).reset_index()
-        x_axis = 'date'
-        x_label = 'Date'
-    elif date_segment == "Weekly":
-        trend_data = df_filtered.groupby(['year', 'week']).agg({
-            'line_revenue': 'sum',
-            'profit': 'sum'
-        }).reset_index()
-        trend_data['period'] = trend_data['year'].astype(str) + '-W' + trend_data['week'].astype(str)
-        x_axis = 'period'
-        x_label = 'Week'
-    elif date_segment == "Monthly":
-        trend_data = df_filtered.groupby('year_month').agg({
-            'line_revenue': 'sum',
-            'profit': 'sum'
-        }).reset_index()
-        x_axis = 'year_month'
-        x_label = 'Month'
-    elif date_segment == "Quarterly":
-        trend_data = df_filtered.groupby('year_quarter').agg({
-            'line_revenue': 'sum',
-            'profit': 'sum'
-        }).reset_index()
-        x_axis = 'year_quarter'
-        x_label = 'Quarter'
-    else:  # Yearly
-        trend_data = df_filtered.groupby('year').agg({
-            'line_revenue': 'sum',
-            'profit': 'sum'
-        }).reset_index()
-        x_axis = 'year'
-        x_label = 'Year'
+    # One daily rollup from the cube; the selected grain is derived from it
+    daily_trend = daily_rollup(cube_filtered, ['line_revenue', 'profit'])
+    trend_data = time_rollup(daily_trend, date_segment)
+    x_axis, x_label = {
+        "Daily": ('date', 'Date'),
+        "Weekly": ('period', 'Week'),
+        "Monthly": ('year_month', 'Month'),
+        "Quarterly": ('year_quarter', 'Quarter'),
+        "Yearly": ('year', 'Year')
+    }[date_segment]
     
     fig_trend = go.Figure()
     
@@ -481,7 +525,7 @@ if page == "🏠 Executive Overview":
         height=400
     )
     
-    st.plotly_chart(fig_trend, use_container_width=True)
+    render_chart(fig_trend)
     
     # Insights
     create_insight_box(
@@ -503,11 +547,11 @@ if page == "🏠 Executive Overview":
     
     with col1:
         st.markdown('<div class="section-header"><h3>📦 Top Categories by Revenue</h3></div>', unsafe_allow_html=True)
+        timer.block("Overview: categories")
         
-        category_performance = df_filtered.groupby('product_category').agg({
-            'line_revenue': 'sum',
-            'profit': 'sum'
-        }).sort_values('line_revenue', ascending=False).reset_index()
+        category_performance = cube_group(
+            cube_filtered, 'product_category', ['line_revenue', 'profit']
+        ).sort_values('line_revenue', ascending=False).reset_index()
         
         fig_category = px.bar(
             category_performance,
@@ -521,7 +565,7 @@ if page == "🏠 Executive Overview":
         )
         fig_category.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
         fig_category.update_layout(height=350, showlegend=False)
-        st.plotly_chart(fig_category, use_container_width=True)
+        render_chart(fig_category)
         
         # Category insights
         top_category = category_performance.iloc[0]
@@ -534,11 +578,11 @@ if page == "🏠 Executive Overview":
     
     with col2:
         st.markdown('<div class="section-header"><h3>🏪 Store Performance</h3></div>', unsafe_allow_html=True)
+        timer.block("Overview: stores")
         
-        store_performance = df_filtered.groupby('store_location').agg({
-            'line_revenue': 'sum',
-            'profit': 'sum'
-        }).sort_values('line_revenue', ascending=False).reset_index()
+        store_performance = cube_group(
+            cube_filtered, 'store_location', ['line_revenue', 'profit']
+        ).sort_values('line_revenue', ascending=False).reset_index()
         
         fig_store = px.bar(
             store_performance,
@@ -551,7 +595,7 @@ if page == "🏠 Executive Overview":
         )
         fig_store.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
         fig_store.update_layout(height=350, showlegend=False)
-        st.plotly_chart(fig_store, use_container_width=True)
+        render_chart(fig_store)
         
         # Store insights
         top_store = store_performance.iloc[0]
@@ -569,7 +613,8 @@ if page == "🏠 Executive Overview":
     
     with col1:
         st.markdown('<div class="section-header"><h3>📱 Channel Split</h3></div>', unsafe_allow_html=True)
-        channel_data = df_filtered.groupby('channel')['line_revenue'].sum().reset_index()
+        timer.block("Overview: channels")
+        channel_data = cube_group(cube_filtered, 'channel', ['line_revenue'])
         fig_channel = px.pie(
             channel_data,
             values='line_revenue',
@@ -578,11 +623,12 @@ if page == "🏠 Executive Overview":
             color_discrete_sequence=['#4ECDC4', '#FF6B6B']
         )
         fig_channel.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig_channel, use_container_width=True)
+        render_chart(fig_channel)
     
     with col2:
         st.markdown('<div class="section-header"><h3>👥 Customer Segments</h3></div>', unsafe_allow_html=True)
-        segment_data = df_filtered.groupby('customer_segment')['line_revenue'].sum().reset_index()
+        timer.block("Overview: segments")
+        segment_data = cube_group(cube_filtered, 'customer_segment', ['line_revenue'])
         fig_segment = px.pie(
             segment_data,
             values='line_revenue',
@@ -591,11 +637,12 @@ if page == "🏠 Executive Overview":
             color_discrete_sequence=['#95E1D3', '#F38181', '#EAFFD0']
         )
         fig_segment.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig_segment, use_container_width=True)
+        render_chart(fig_segment)
     
     with col3:
         st.markdown('<div class="section-header"><h3>💳 Payment Methods</h3></div>', unsafe_allow_html=True)
-        payment_data = df_filtered.groupby('payment_method')['line_revenue'].sum().reset_index()
+        timer.block("Overview: payment methods")
+        payment_data = cube_group(cube_filtered, 'payment_method', ['line_revenue'])
         fig_payment = px.pie(
             payment_data,
             values='line_revenue',
@@ -603,7 +650,7 @@ if page == "🏠 Executive Overview":
             hole=0.4
         )
         fig_payment.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig_payment, use_container_width=True)
+        render_chart(fig_payment)
 
 # ============================================
 # PAGE 2: SALES PERFORMANCE
@@ -615,13 +662,14 @@ elif page == "📈 Sales Performance":
     st.markdown(f'<p class="sub-header">Detailed sales metrics and trends | {date_segment} View</p>', unsafe_allow_html=True)
     
     # Sales Metrics
+    timer.block("Sales: metrics")
     st.markdown('<div class="section-header"><h2>💰 Sales Metrics</h2></div>', unsafe_allow_html=True)
     
     col1, col2, col3, col4 = st.columns(4)
     
-    gross_revenue = df_filtered['gross_revenue'].sum()
-    total_discounts = df_filtered['total_discount'].sum()
-    net_revenue = df_filtered['line_revenue'].sum()
+    gross_revenue = cube_kpis['gross_revenue']
+    total_discounts = cube_kpis['total_discount']
+    net_revenue = cube_kpis['line_revenue']
     discount_rate = (total_discounts / gross_revenue * 100) if gross_revenue > 0 else 0
     
     with col1:
@@ -631,7 +679,7 @@ elif page == "📈 Sales Performance":
     with col3:
         st.metric("💰 Net Revenue", format_currency(net_revenue))
     with col4:
-        avg_discount = df_filtered['total_discount'].mean()
+        avg_discount = cube_kpis['total_discount'] / cube_kpis['rows']
         st.metric("📊 Avg Discount", format_currency(avg_discount))
     
     create_insight_box(
@@ -647,10 +695,11 @@ elif page == "📈 Sales Performance":
     st.markdown("---")
     
     # Sales by Day of Week
+    timer.block("Sales: day of week")
     st.markdown('<div class="section-header"><h2>📅 Sales by Day of Week</h2></div>', unsafe_allow_html=True)
     
     day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    day_sales = df_filtered.groupby('day_of_week').agg({
+    day_sales = plan.agg('day_of_week', {
         'line_revenue': 'sum',
         'transaction_id': 'nunique'
     }).reindex(day_order).reset_index()
@@ -674,7 +723,7 @@ elif page == "📈 Sales Performance":
         height=400
     )
     
-    st.plotly_chart(fig_day, use_container_width=True)
+    render_chart(fig_day)
     
     # Day insights
     best_day = day_sales.loc[day_sales['Revenue'].idxmax()]
@@ -700,17 +749,18 @@ elif page == "📈 Sales Performance":
     
     with col1:
         st.subheader("🥇 Top 10 Products by Revenue")
-        top_products = df_filtered.groupby('product_name').agg({
+        timer.block("Sales: top products")
+        top_products = top_k(plan.agg('product_name', {
             'line_revenue': 'sum',
             'quantity': 'sum',
             'profit': 'sum'
-        }).sort_values('line_revenue', ascending=False).head(10).reset_index()
+        }), 10, 'line_revenue').reset_index()
         
         top_products['Revenue'] = top_products['line_revenue'].apply(format_currency)
         top_products['Profit'] = top_products['profit'].apply(format_currency)
         top_products['Units Sold'] = top_products['quantity']
         
-        st.dataframe(
+        render_table(
             top_products[['product_name', 'Revenue', 'Profit', 'Units Sold']],
             hide_index=True,
             use_container_width=True
@@ -718,17 +768,18 @@ elif page == "📈 Sales Performance":
     
     with col2:
         st.subheader("📉 Bottom 10 Products by Revenue")
-        bottom_products = df_filtered.groupby('product_name').agg({
+        timer.block("Sales: bottom products")
+        bottom_products = bottom_k(plan.agg('product_name', {
             'line_revenue': 'sum',
             'quantity': 'sum',
             'profit': 'sum'
-        }).sort_values('line_revenue', ascending=True).head(10).reset_index()
+        }), 10, 'line_revenue').reset_index()
         
         bottom_products['Revenue'] = bottom_products['line_revenue'].apply(format_currency)
         bottom_products['Profit'] = bottom_products['profit'].apply(format_currency)
         bottom_products['Units Sold'] = bottom_products['quantity']
         
-        st.dataframe(
+        render_table(
             bottom_products[['product_name', 'Revenue', 'Profit', 'Units Sold']],
             hide_index=True,
             use_container_width=True
@@ -755,35 +806,47 @@ elif page == "👥 Customer Insights":
     st.markdown(f'<p class="sub-header">Understanding customer patterns and value</p>', unsafe_allow_html=True)
     
     # Customer Metrics
+    timer.block("Customers: metrics")
     st.markdown('<div class="section-header"><h2>📊 Customer Metrics</h2></div>', unsafe_allow_html=True)
     
+    # Customer value, repeat rate and the top-20 table all group by customer_id.
+    # A customer's segment is the one on their most recent purchase ('last'
+    # on the date-sorted rows; same-day purchases keep their file order)
+    plan.request('customer_id', {
+        'line_revenue': 'sum',
+        'profit': 'sum',
+        'transaction_id': 'nunique',
+        'customer_segment': 'last'
+    }, size=True)
+    
     col1, col2, col3, col4 = st.columns(4)
     
-    total_customers = df_filtered['customer_id'].nunique()
-    total_transactions = df_filtered['transaction_id'].nunique()
+    total_customers = distinct_count('customer_id')
+    total_transactions = distinct_count('transaction_id')
     avg_transactions_per_customer = total_transactions / total_customers if total_customers > 0 else 0
-    customer_lifetime_value = df_filtered.groupby('customer_id')['line_revenue'].sum().mean()
+    customer_lifetime_value = plan.agg('customer_id', {'line_revenue': 'sum'})['line_revenue'].mean()
     
     with col1:
-        st.metric("👥 Total Customers", f"{total_customers:,}")
+        st.metric("👥 Total Customers", f"{total_customers:,}", help=count_help)
     with col2:
         st.metric("🔄 Avg Transactions/Customer", f"{avg_transactions_per_customer:.2f}")
     with col3:
         st.metric("💎 Avg Customer Value", format_currency(customer_lifetime_value))
     with col4:
-        repeat_customers = df_filtered.groupby('customer_id').size()
+        repeat_customers = plan.size('customer_id')
         repeat_rate = (repeat_customers > 1).sum() / total_customers * 100 if total_customers > 0 else 0
         st.metric("🔁 Repeat Customer Rate", format_percentage(repeat_rate))
     
     st.markdown("---")
     
     # Customer Segmentation
+    timer.block("Customers: segment revenue")
     st.markdown('<div class="section-header"><h2>🎯 Customer Segmentation Analysis</h2></div>', unsafe_allow_html=True)
     
     col1, col2 = st.columns(2)
     
     with col1:
-        segment_analysis = df_filtered.groupby('customer_segment').agg({
+        segment_analysis = grouped_metrics('customer_segment', {
             'customer_id': 'nunique',
             'line_revenue': 'sum',
             'profit': 'sum',
@@ -801,9 +864,10 @@ elif page == "👥 Customer Insights":
             title='Revenue by Customer Segment'
         )
         fig_segment_revenue.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
-        st.plotly_chart(fig_segment_revenue, use_container_width=True)
+        render_chart(fig_segment_revenue)
     
     with col2:
+        timer.block("Customers: segment distribution")
         fig_segment_customers = px.pie(
             segment_analysis,
             values='Customers',
@@ -813,7 +877,7 @@ elif page == "👥 Customer Insights":
             color_discrete_sequence=['#95E1D3', '#F38181', '#EAFFD0']
         )
         fig_segment_customers.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig_segment_customers, use_container_width=True)
+        render_chart(fig_segment_customers)
     
     # Segment insights
     best_segment = segment_analysis.loc[segment_analysis['Revenue'].idxmax()]
@@ -831,14 +895,15 @@ elif page == "👥 Customer Insights":
     st.markdown("---")
     
     # Top Customers
+    timer.block("Customers: top customers")
     st.markdown('<div class="section-header"><h2>🏆 Top 20 Customers by Value</h2></div>', unsafe_allow_html=True)
     
-    top_customers = df_filtered.groupby('customer_id').agg({
+    top_customers = top_k(plan.agg('customer_id', {
         'line_revenue': 'sum',
         'profit': 'sum',
         'transaction_id': 'nunique',
-        'customer_segment': 'first'
-    }).sort_values('line_revenue', ascending=False).head(20).reset_index()
+        'customer_segment': 'last'
+    }), 20, 'line_revenue').reset_index()
     
     top_customers.columns = ['Customer ID', 'Total Revenue', 'Total Profit', 'Transactions', 'Segment']
     top_customers['Rank'] = range(1, len(top_customers) + 1)
@@ -850,7 +915,7 @@ elif page == "👥 Customer Insights":
     display_customers['Total Profit'] = display_customers['Total Profit'].apply(format_currency)
     display_customers['Avg Order Value'] = display_customers['Avg Order Value'].apply(format_currency)
     
-    st.dataframe(
+    render_table(
         display_customers[['Rank', 'Customer ID', 'Segment', 'Total Revenue', 'Total Profit', 'Transactions', 'Avg Order Value']],
         hide_index=True,
         use_container_width=True,
@@ -864,7 +929,7 @@ elif page == "👥 Customer Insights":
           {format_currency(top_customers.iloc[0]['Total Revenue'])}<br>
         • Recommendation: Create VIP loyalty program for top 20 customers<br>
         • Potential: These 20 customers represent 
-          {format_percentage((top_customers['Total Revenue'].sum() / df_filtered['line_revenue'].sum()) * 100)} 
+          {format_percentage((top_customers['Total Revenue'].sum() / cube_kpis['line_revenue']) * 100)} 
           of total revenue
         """,
         "success"
@@ -879,10 +944,11 @@ elif page == "👥 Customer Insights":
     
     with col1:
         # Average basket size by segment
-        basket_analysis = df_filtered.groupby(['customer_segment', 'bill_id']).agg({
+        timer.block("Customers: basket value")
+        basket_analysis = plan.agg(['customer_segment', 'bill_id'], {
             'line_revenue': 'sum'
         }).reset_index()
-        avg_basket = basket_analysis.groupby('customer_segment')['line_revenue'].mean().reset_index()
+        avg_basket = basket_analysis.groupby('customer_segment', observed=True)['line_revenue'].mean().reset_index()
         avg_basket.columns = ['Segment', 'Avg Basket Value']
         
         fig_basket = px.bar(
@@ -895,12 +961,13 @@ elif page == "👥 Customer Insights":
             text='Avg Basket Value'
         )
         fig_basket.update_traces(texttemplate='$%{text:.2f}', textposition='outside')
-        st.plotly_chart(fig_basket, use_container_width=True)
+        render_chart(fig_basket)
     
     with col2:
         # Products per transaction by segment
-        products_per_transaction = df_filtered.groupby(['customer_segment', 'transaction_id']).size().reset_index(name='products')
-        avg_products = products_per_transaction.groupby('customer_segment')['products'].mean().reset_index()
+        timer.block("Customers: products per transaction")
+        products_per_transaction = plan.size(['customer_segment', 'transaction_id']).reset_index(name='products')
+        avg_products = products_per_transaction.groupby('customer_segment', observed=True)['products'].mean().reset_index()
         avg_products.columns = ['Segment', 'Avg Products']
         
         fig_products = px.bar(
@@ -913,7 +980,7 @@ elif page == "👥 Customer Insights":
             text='Avg Products'
         )
         fig_products.update_traces(texttemplate='%{text:.1f}', textposition='outside')
-        st.plotly_chart(fig_products, use_container_width=True)
+        render_chart(fig_products)
 
 # ============================================
 # PAGE 4: PRODUCT ANALYTICS
@@ -925,14 +992,15 @@ elif page == "📦 Product Analytics":
     st.markdown(f'<p class="sub-header">Deep dive into product performance and profitability</p>', unsafe_allow_html=True)
     
     # Product Metrics
+    timer.block("Products: metrics")
     st.markdown('<div class="section-header"><h2>📊 Product Metrics</h2></div>', unsafe_allow_html=True)
     
     col1, col2, col3, col4 = st.columns(4)
     
     total_products = df_filtered['product_id'].nunique()
-    total_units_sold = df_filtered['quantity'].sum()
+    total_units_sold = cube_kpis['quantity']
     avg_unit_price = df_filtered['unit_price'].mean()
-    avg_units_per_transaction = df_filtered.groupby('transaction_id')['quantity'].sum().mean()
+    avg_units_per_transaction = plan.agg('transaction_id', {'quantity': 'sum'})['quantity'].mean()
     
     with col1:
         st.metric("📦 Total Products", f"{total_products:,}")
@@ -946,9 +1014,10 @@ elif page == "📦 Product Analytics":
     st.markdown("---")
     
     # Category Performance Matrix
+    timer.block("Products: category matrix")
     st.markdown('<div class="section-header"><h2>📊 Category Performance Matrix</h2></div>', unsafe_allow_html=True)
     
-    category_matrix = df_filtered.groupby('product_category').agg({
+    category_matrix = grouped_metrics('product_category', {
         'line_revenue': 'sum',
         'profit': 'sum',
         'quantity': 'sum',
@@ -979,7 +1048,7 @@ elif page == "📦 Product Analytics":
     fig_matrix.add_vline(x=avg_revenue, line_dash="dash", line_color="gray", annotation_text="Avg Revenue")
     
     fig_matrix.update_layout(height=500)
-    st.plotly_chart(fig_matrix, use_container_width=True)
+    render_chart(fig_matrix)
     
     # Quadrant analysis
     create_insight_box(
@@ -996,6 +1065,7 @@ elif page == "📦 Product Analytics":
     st.markdown("---")
     
     # Detailed Category Table
+    timer.block("Products: category table")
     st.markdown('<div class="section-header"><h2>📋 Detailed Category Performance</h2></div>', unsafe_allow_html=True)
     
     category_table = category_matrix.copy()
@@ -1004,7 +1074,7 @@ elif page == "📦 Product Analytics":
     category_table['Discounts'] = category_table['total_discount'].apply(format_currency)
     category_table['Avg Transaction'] = category_table['Avg Transaction Value'].apply(format_currency)
     
-    st.dataframe(
+    render_table(
         category_table[['product_category', 'Revenue', 'Profit', 'Profit Margin %', 
                        'quantity', 'transaction_id', 'Discounts', 'Avg Transaction']].rename(columns={
             'product_category': 'Category',
@@ -1024,18 +1094,19 @@ elif page == "📦 Product Analytics":
     
     with col1:
         st.subheader("🟢 Most Profitable Products")
-        profitable_products = df_filtered.groupby('product_name').agg({
+        timer.block("Products: most profitable")
+        profitable_products = plan.agg('product_name', {
             'profit': 'sum',
             'line_revenue': 'sum',
             'quantity': 'sum'
         }).reset_index()
         profitable_products['Profit Margin %'] = (profitable_products['profit'] / profitable_products['line_revenue'] * 100).round(2)
-        profitable_products = profitable_products.sort_values('profit', ascending=False).head(10)
+        profitable_products = top_k(profitable_products, 10, 'profit')
         
         profitable_products['Profit'] = profitable_products['profit'].apply(format_currency)
         profitable_products['Revenue'] = profitable_products['line_revenue'].apply(format_currency)
         
-        st.dataframe(
+        render_table(
             profitable_products[['product_name', 'Revenue', 'Profit', 'Profit Margin %', 'quantity']].rename(columns={
                 'product_name': 'Product',
                 'quantity': 'Units'
@@ -1046,18 +1117,19 @@ elif page == "📦 Product Analytics":
     
     with col2:
         st.subheader("🔴 Least Profitable Products")
-        unprofitable_products = df_filtered.groupby('product_name').agg({
+        timer.block("Products: least profitable")
+        unprofitable_products = plan.agg('product_name', {
             'profit': 'sum',
             'line_revenue': 'sum',
             'quantity': 'sum'
         }).reset_index()
         unprofitable_products['Profit Margin %'] = (unprofitable_products['profit'] / unprofitable_products['line_revenue'] * 100).round(2)
-        unprofitable_products = unprofitable_products.sort_values('profit', ascending=True).head(10)
+        unprofitable_products = bottom_k(unprofitable_products, 10, 'profit')
         
         unprofitable_products['Profit'] = unprofitable_products['profit'].apply(format_currency)
         unprofitable_products['Revenue'] = unprofitable_products['line_revenue'].apply(format_currency)
         
-        st.dataframe(
+        render_table(
             unprofitable_products[['product_name', 'Revenue', 'Profit', 'Profit Margin %', 'quantity']].rename(columns={
                 'product_name': 'Product',
                 'quantity': 'Units'
@@ -1087,9 +1159,10 @@ elif page == "🏪 Store Performance":
     st.markdown(f'<p class="sub-header">Compare and analyze store-level performance</p>', unsafe_allow_html=True)
     
     # Store Metrics
+    timer.block("Stores: metrics")
     st.markdown('<div class="section-header"><h2>📊 Store Comparison</h2></div>', unsafe_allow_html=True)
     
-    store_metrics = df_filtered.groupby('store_location').agg({
+    store_metrics = grouped_metrics('store_location', {
         'line_revenue': 'sum',
         'profit': 'sum',
         'transaction_id': 'nunique',
@@ -1124,6 +1197,7 @@ elif page == "🏪 Store Performance":
     col1, col2 = st.columns(2)
     
     with col1:
+        timer.block("Stores: revenue chart")
         fig_store_revenue = px.bar(
             store_metrics,
             x='store_location',
@@ -1134,9 +1208,10 @@ elif page == "🏪 Store Performance":
             text='line_revenue'
         )
         fig_store_revenue.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
-        st.plotly_chart(fig_store_revenue, use_container_width=True)
+        render_chart(fig_store_revenue)
     
     with col2:
+        timer.block("Stores: customers chart")
         fig_store_customers = px.bar(
             store_metrics,
             x='store_location',
@@ -1148,11 +1223,12 @@ elif page == "🏪 Store Performance":
         )
         fig_store_customers.update_traces(texttemplate='%{text:,}', textposition='outside')
         fig_store_customers.update_layout(showlegend=False)
-        st.plotly_chart(fig_store_customers, use_container_width=True)
+        render_chart(fig_store_customers)
     
     st.markdown("---")
     
     # Store Performance Table
+    timer.block("Stores: table")
     st.markdown('<div class="section-header"><h2>📋 Detailed Store Metrics</h2></div>', unsafe_allow_html=True)
     
     store_table = store_metrics.copy()
@@ -1160,7 +1236,7 @@ elif page == "🏪 Store Performance":
     store_table['Profit'] = store_table['profit'].apply(format_currency)
     store_table['Avg Transaction'] = store_table['Avg Transaction Value'].apply(format_currency)
     
-    st.dataframe(
+    render_table(
         store_table[['store_location', 'Revenue', 'Profit', 'Profit Margin %', 
                     'transaction_id', 'customer_id', 'Avg Transaction', 'Avg Items per Transaction']].rename(columns={
             'store_location': 'Store',
@@ -1189,9 +1265,10 @@ elif page == "🏪 Store Performance":
     st.markdown("---")
     
     # Category Performance by Store
+    timer.block("Stores: category mix")
     st.markdown('<div class="section-header"><h2>📦 Category Performance by Store</h2></div>', unsafe_allow_html=True)
     
-    store_category = df_filtered.groupby(['store_location', 'product_category'])['line_revenue'].sum().reset_index()
+    store_category = cube_group(cube_filtered, ['store_location', 'product_category'], ['line_revenue'])
     
     fig_store_category = px.bar(
         store_category,
@@ -1203,7 +1280,7 @@ elif page == "🏪 Store Performance":
         barmode='group'
     )
     fig_store_category.update_layout(height=400)
-    st.plotly_chart(fig_store_category, use_container_width=True)
+    render_chart(fig_store_category)
     
     create_insight_box(
         "📊 Category Mix Insights",
@@ -1225,9 +1302,10 @@ elif page == "🔄 Channel & Payment Analysis":
     st.markdown(f'<p class="sub-header">Analyze sales channels and payment preferences</p>', unsafe_allow_html=True)
     
     # Channel Metrics
+    timer.block("Channels: channel metrics")
     st.markdown('<div class="section-header"><h2>📱 Channel Performance</h2></div>', unsafe_allow_html=True)
     
-    channel_metrics = df_filtered.groupby('channel').agg({
+    channel_metrics = grouped_metrics('channel', {
         'line_revenue': 'sum',
         'profit': 'sum',
         'transaction_id': 'nunique',
@@ -1251,6 +1329,7 @@ elif page == "🔄 Channel & Payment Analysis":
                 st.metric("📊 Margin", format_percentage(row['Profit Margin %']))
     
     with col2:
+        timer.block("Channels: channel split")
         fig_channel_split = px.pie(
             channel_metrics,
             values='line_revenue',
@@ -1260,7 +1339,7 @@ elif page == "🔄 Channel & Payment Analysis":
             color_discrete_sequence=['#4ECDC4', '#FF6B6B']
         )
         fig_channel_split.update_traces(textposition='inside', textinfo='percent+label+value')
-        st.plotly_chart(fig_channel_split, use_container_width=True)
+        render_chart(fig_channel_split)
     
     # Channel insights
     dominant_channel = channel_metrics.loc[channel_metrics['line_revenue'].idxmax()]
@@ -1278,9 +1357,10 @@ elif page == "🔄 Channel & Payment Analysis":
     st.markdown("---")
     
     # Payment Method Analysis
+    timer.block("Channels: payment metrics")
     st.markdown('<div class="section-header"><h2>💳 Payment Method Analysis</h2></div>', unsafe_allow_html=True)
     
-    payment_metrics = df_filtered.groupby('payment_method').agg({
+    payment_metrics = grouped_metrics('payment_method', {
         'line_revenue': 'sum',
         'transaction_id': 'nunique',
         'customer_id': 'nunique'
@@ -1292,6 +1372,7 @@ elif page == "🔄 Channel & Payment Analysis":
     col1, col2 = st.columns(2)
     
     with col1:
+        timer.block("Channels: payment revenue")
         fig_payment_revenue = px.bar(
             payment_metrics,
             x='payment_method',
@@ -1303,9 +1384,10 @@ elif page == "🔄 Channel & Payment Analysis":
         )
         fig_payment_revenue.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
         fig_payment_revenue.update_layout(showlegend=False)
-        st.plotly_chart(fig_payment_revenue, use_container_width=True)
+        render_chart(fig_payment_revenue)
     
     with col2:
+        timer.block("Channels: payment transactions")
         fig_payment_transactions = px.pie(
             payment_metrics,
             values='transaction_id',
@@ -1314,18 +1396,19 @@ elif page == "🔄 Channel & Payment Analysis":
             hole=0.4
         )
         fig_payment_transactions.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig_payment_transactions, use_container_width=True)
+        render_chart(fig_payment_transactions)
     
     st.markdown("---")
     
     # Payment Method Table
+    timer.block("Channels: payment table")
     st.markdown('<div class="section-header"><h2>📋 Payment Method Details</h2></div>', unsafe_allow_html=True)
     
     payment_table = payment_metrics.copy()
     payment_table['Revenue'] = payment_table['line_revenue'].apply(format_currency)
     payment_table['Avg Transaction'] = payment_table['Avg Transaction Value'].apply(format_currency)
     
-    st.dataframe(
+    render_table(
         payment_table[['payment_method', 'Revenue', 'transaction_id', 'customer_id', 'Avg Transaction']].rename(columns={
             'payment_method': 'Payment Method',
             'transaction_id': 'Transactions',
@@ -1351,9 +1434,10 @@ elif page == "🔄 Channel & Payment Analysis":
     st.markdown("---")
     
     # Channel x Payment Cross-Analysis
+    timer.block("Channels: channel × payment")
     st.markdown('<div class="section-header"><h2>🔀 Channel × Payment Cross-Analysis</h2></div>', unsafe_allow_html=True)
     
-    channel_payment = df_filtered.groupby(['channel', 'payment_method'])['line_revenue'].sum().reset_index()
+    channel_payment = cube_group(cube_filtered, ['channel', 'payment_method'], ['line_revenue'])
     
     fig_heatmap = px.density_heatmap(
         channel_payment,
@@ -1364,7 +1448,7 @@ elif page == "🔄 Channel & Payment Analysis":
         color_continuous_scale='YlOrRd',
         labels={'line_revenue': 'Revenue ($)'}
     )
-    st.plotly_chart(fig_heatmap, use_container_width=True)
+    render_chart(fig_heatmap)
     
     create_insight_box(
         "🔍 Cross-Analysis Insights",
@@ -1387,15 +1471,16 @@ elif page == "🎯 Profitability Analysis":
     st.markdown(f'<p class="sub-header">Deep dive into profit margins and cost analysis</p>', unsafe_allow_html=True)
     
     # Profitability Metrics
+    timer.block("Profitability: KPIs")
     st.markdown('<div class="section-header"><h2>💰 Profitability Overview</h2></div>', unsafe_allow_html=True)
     
     col1, col2, col3, col4, col5 = st.columns(5)
     
-    total_revenue = df_filtered['line_revenue'].sum()
-    total_cost = df_filtered['cost'].sum()
-    total_profit = df_filtered['profit'].sum()
+    total_revenue = cube_kpis['line_revenue']
+    total_cost = cube_kpis['cost']
+    total_profit = cube_kpis['profit']
     overall_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else 0
-    total_discounts = df_filtered['total_discount'].sum()
+    total_discounts = cube_kpis['total_discount']
     
     with col1:
         st.metric("💰 Revenue", format_currency(total_revenue))
@@ -1419,28 +1504,15 @@ elif page == "🎯 Profitability Analysis":
     st.markdown("---")
     
     # Profit Trend
+    timer.block("Profitability: trend")
     st.markdown('<div class="section-header"><h2>📈 Profit Trend Analysis</h2></div>', unsafe_allow_html=True)
     
-    if date_segment == "Daily":
-        profit_trend = df_filtered.groupby('date').agg({
-            'line_revenue': 'sum',
-            'cost': 'sum',
-            'profit': 'sum'
-        }).reset_index()
-        x_axis = 'date'
-    elif date_segment == "Monthly":
-        profit_trend = df_filtered.groupby('year_month').agg({
-            'line_revenue': 'sum',
-            'cost': 'sum',
-            'profit': 'sum'
-        }).reset_index()
+    daily_profit = daily_rollup(cube_filtered, ['line_revenue', 'cost', 'profit'])
+    if date_segment == "Monthly":
+        profit_trend = time_rollup(daily_profit, "Monthly")
         x_axis = 'year_month'
     else:
-        profit_trend = df_filtered.groupby('date').agg({
-            'line_revenue': 'sum',
-            'cost': 'sum',
-            'profit': 'sum'
-        }).reset_index()
+        profit_trend = time_rollup(daily_profit, "Daily")
         x_axis = 'date'
     
     profit_trend['Profit Margin %'] = (profit_trend['profit'] / profit_trend['line_revenue'] * 100).round(2)
@@ -1485,7 +1557,7 @@ elif page == "🎯 Profitability Analysis":
         barmode='group'
     )
     
-    st.plotly_chart(fig_profit_trend, use_container_width=True)
+    render_chart(fig_profit_trend)
     
     st.markdown("---")
     
@@ -1495,11 +1567,8 @@ elif page == "🎯 Profitability Analysis":
     tab1, tab2, tab3, tab4 = st.tabs(["📦 By Category", "🏪 By Store", "📱 By Channel", "👥 By Segment"])
     
     with tab1:
-        category_profit = df_filtered.groupby('product_category').agg({
-            'line_revenue': 'sum',
-            'cost': 'sum',
-            'profit': 'sum'
-        }).reset_index()
+        timer.block("Profitability: by category")
+        category_profit = cube_group(cube_filtered, 'product_category', ['line_revenue', 'cost', 'profit'])
         category_profit['Profit Margin %'] = (category_profit['profit'] / category_profit['line_revenue'] * 100).round(2)
         category_profit = category_profit.sort_values('profit', ascending=False)
         
@@ -1519,22 +1588,19 @@ elif page == "🎯 Profitability Analysis":
             marker_color='lightgreen'
         ))
         fig_cat_profit.update_layout(title='Revenue vs Profit by Category', barmode='group', height=400)
-        st.plotly_chart(fig_cat_profit, use_container_width=True)
+        render_chart(fig_cat_profit)
         
         # Table
         cat_table = category_profit.copy()
         cat_table['Revenue'] = cat_table['line_revenue'].apply(format_currency)
         cat_table['Cost'] = cat_table['cost'].apply(format_currency)
         cat_table['Profit'] = cat_table['profit'].apply(format_currency)
-        st.dataframe(cat_table[['product_category', 'Revenue', 'Cost', 'Profit', 'Profit Margin %']], 
+        render_table(cat_table[['product_category', 'Revenue', 'Cost', 'Profit', 'Profit Margin %']], 
                     hide_index=True, use_container_width=True)
     
     with tab2:
-        store_profit = df_filtered.groupby('store_location').agg({
-            'line_revenue': 'sum',
-            'cost': 'sum',
-            'profit': 'sum'
-        }).reset_index()
+        timer.block("Profitability: by store")
+        store_profit = cube_group(cube_filtered, 'store_location', ['line_revenue', 'cost', 'profit'])
         store_profit['Profit Margin %'] = (store_profit['profit'] / store_profit['line_revenue'] * 100).round(2)
         
         fig_store_profit = px.bar(
@@ -1545,22 +1611,19 @@ elif page == "🎯 Profitability Analysis":
             barmode='group',
             labels={'value': 'Amount ($)', 'store_location': 'Store'}
         )
-        st.plotly_chart(fig_store_profit, use_container_width=True)
+        render_chart(fig_store_profit)
         
         # Table
         store_table = store_profit.copy()
         store_table['Revenue'] = store_table['line_revenue'].apply(format_currency)
         store_table['Cost'] = store_table['cost'].apply(format_currency)
         store_table['Profit'] = store_table['profit'].apply(format_currency)
-        st.dataframe(store_table[['store_location', 'Revenue', 'Cost', 'Profit', 'Profit Margin %']], 
+        render_table(store_table[['store_location', 'Revenue', 'Cost', 'Profit', 'Profit Margin %']], 
                     hide_index=True, use_container_width=True)
     
     with tab3:
-        channel_profit = df_filtered.groupby('channel').agg({
-            'line_revenue': 'sum',
-            'cost': 'sum',
-            'profit': 'sum'
-        }).reset_index()
+        timer.block("Profitability: by channel")
+        channel_profit = cube_group(cube_filtered, 'channel', ['line_revenue', 'cost', 'profit'])
         channel_profit['Profit Margin %'] = (channel_profit['profit'] / channel_profit['line_revenue'] * 100).round(2)
         
         fig_channel_profit = px.bar(
@@ -1570,22 +1633,19 @@ elif page == "🎯 Profitability Analysis":
             title='Revenue, Cost & Profit by Channel',
             barmode='group'
         )
-        st.plotly_chart(fig_channel_profit, use_container_width=True)
+        render_chart(fig_channel_profit)
         
         # Table
         channel_table = channel_profit.copy()
         channel_table['Revenue'] = channel_table['line_revenue'].apply(format_currency)
         channel_table['Cost'] = channel_table['cost'].apply(format_currency)
         channel_table['Profit'] = channel_table['profit'].apply(format_currency)
-        st.dataframe(channel_table[['channel', 'Revenue', 'Cost', 'Profit', 'Profit Margin %']], 
+        render_table(channel_table[['channel', 'Revenue', 'Cost', 'Profit', 'Profit Margin %']], 
                     hide_index=True, use_container_width=True)
     
     with tab4:
-        segment_profit = df_filtered.groupby('customer_segment').agg({
-            'line_revenue': 'sum',
-            'cost': 'sum',
-            'profit': 'sum'
-        }).reset_index()
+        timer.block("Profitability: by segment")
+        segment_profit = cube_group(cube_filtered, 'customer_segment', ['line_revenue', 'cost', 'profit'])
         segment_profit['Profit Margin %'] = (segment_profit['profit'] / segment_profit['line_revenue'] * 100).round(2)
         
         fig_segment_profit = px.bar(
@@ -1595,19 +1655,20 @@ elif page == "🎯 Profitability Analysis":
             title='Revenue, Cost & Profit by Customer Segment',
             barmode='group'
         )
-        st.plotly_chart(fig_segment_profit, use_container_width=True)
+        render_chart(fig_segment_profit)
         
         # Table
         segment_table = segment_profit.copy()
         segment_table['Revenue'] = segment_table['line_revenue'].apply(format_currency)
         segment_table['Cost'] = segment_table['cost'].apply(format_currency)
         segment_table['Profit'] = segment_table['profit'].apply(format_currency)
-        st.dataframe(segment_table[['customer_segment', 'Revenue', 'Cost', 'Profit', 'Profit Margin %']], 
+        render_table(segment_table[['customer_segment', 'Revenue', 'Cost', 'Profit', 'Profit Margin %']], 
                     hide_index=True, use_container_width=True)
     
     st.markdown("---")
     
     # Key Recommendations
+    timer.block("Profitability: recommendations")
     st.markdown('<div class="section-header"><h2>💡 Profitability Recommendations</h2></div>', unsafe_allow_html=True)
     
     recommendations = []
@@ -1638,6 +1699,28 @@ elif page == "🎯 Profitability Analysis":
 # FOOTER
 # ============================================
 
+timer.end_block()
+timer.stop(page_timing)
+
+if show_timings:
+    filter_cache_stats = {frame: get_filter_cache(frame).stats() for frame in ("rows", "cube")}
+    log_timings(timer, {'page': page, 'rows': len(df), 'filtered_rows': len(df_filtered),
+                        'approximate_counts': approximate_counts,
+                        'groupby_scans': plan.scans, 'aggregation_requests': plan.requests,
+                        'filter_cache': filter_cache_stats})
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        timings = timer.to_frame()
+        st.dataframe(
+            timings.style.format({'ms': '{:,.1f}', 'rows_in': '{:,.0f}', 'rows_out': '{:,.0f}'}, na_rep=''),
+            hide_index=True, use_container_width=True
+        )
+        st.caption(f"Render so far: {timer.total_ms():,.0f} ms · {plan.scans} row-level groupby scan(s) "
+                   f"for {plan.requests} aggregation request(s) · logged to {TIMING_LOG}")
+        for frame, stats in filter_cache_stats.items():
+            st.caption(f"Filter cache ({frame}): {stats['hits']} hit(s), {stats['misses']} miss(es), "
+                       f"{stats['evictions']} eviction(s) · {stats['entries']} entries, "
+                       f"{stats['bytes'] / 1024:,.0f} KB · hit rate {stats['hit_rate']:.0%}")
+
 st.markdown("---")
 st.markdown("""
     <div style='text-align: center; padding: 2rem; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
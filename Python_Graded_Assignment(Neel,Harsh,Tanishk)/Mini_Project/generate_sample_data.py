@@ -1,17 +1,55 @@
+import io
+import os
+import gzip
+import argparse
+import time
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
-# Set random seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
 
-# Configuration
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Default size, seed and date range. Size and dates match the shipped
+# urbanmart_sales.csv, but the rows do not: that file came from the earlier
+# row-by-row generator, so running this script replaces it with different data
 num_transactions = 500
+seed = 42
 start_date = datetime(2025, 1, 1)
 end_date = datetime(2025, 1, 31)
 
+# First bill number; the counter moves on with a 30% chance after each row
+first_bill = 1001
+new_bill_probability = 0.3
+
+# 20% of rows get a discount between 0 and 2
+discount_probability = 0.2
+
+# Rows are drawn in fixed blocks, each with its own RNG stream seeded from
+# (seed, block number), so the data does not depend on the write chunk size
+BLOCK_ROWS = 100_000
+
+# Rows held in memory per write by default
+CHUNK_ROWS = 1_000_000
+
+# Output formats (picked from the file extension unless --format is given)
+OUTPUT_FORMATS = {'.csv': 'csv', '.csv.gz': 'csv.gz', '.parquet': 'parquet'}
+
+# Partition files a shard keeps open at once (least recently used are closed);
+# lowered to half the process's open-file limit where that is smaller
+MAX_OPEN_WRITERS = 256
+
 # Master data
 stores = [
     {"store_id": "S1", "store_location": "Downtown"},
@@ -33,75 +71,366 @@ products = [
     {"product_id": "P402", "product_name": "Wheat Flour 2kg", "product_category": "Groceries", "unit_price": 5.0},
 ]
 
+customer_ids = [f"C{str(i).zfill(3)}" for i in range(1, 101)]
 customer_segments = ["Regular", "New", "Loyal"]
 payment_methods = ["Cash", "Credit Card", "UPI", "Debit Card"]
 channels = ["In-store", "Online"]
 
-# Generate data
-data = []
-bill_counter = 1001
-
-for i in range(num_transactions):
-    # Generate transaction details
-    transaction_id = f"TXN-2025-{str(i+1).zfill(4)}"
-    bill_id = f"BILL-{bill_counter}"
-    
-    # Random date
-    days_diff = (end_date - start_date).days
-    random_date = start_date + timedelta(days=random.randint(0, days_diff))
-    date_str = random_date.strftime("%Y-%m-%d")
-    
-    # Random store
-    store = random.choice(stores)
-    
-    # Random customer
-    customer_id = f"C{str(random.randint(1, 100)).zfill(3)}"
-    customer_segment = random.choice(customer_segments)
-    
-    # Random product
-    product = random.choice(products)
-    
-    # Random quantity (1-5)
-    quantity = random.randint(1, 5)
-    
-    # Payment method and channel
-    payment_method = random.choice(payment_methods)
-    channel = random.choice(channels)
-    
-    # Discount (20% chance of discount)
-    discount_applied = round(random.uniform(0, 2), 2) if random.random() < 0.2 else 0.0
-    
-    # Create row
-    row = {
-        "transaction_id": transaction_id,
-        "bill_id": bill_id,
-        "date": date_str,
-        "store_id": store["store_id"],
-        "store_location": store["store_location"],
-        "customer_id": customer_id,
-        "customer_segment": customer_segment,
-        "product_id": product["product_id"],
-        "product_category": product["product_category"],
-        "product_name": product["product_name"],
-        "quantity": quantity,
-        "unit_price": product["unit_price"],
-        "payment_method": payment_method,
-        "discount_applied": discount_applied,
-        "channel": channel
-    }
-    
-    data.append(row)
-    
-    # 30% chance to increment bill (new customer)
-    if random.random() < 0.3:
-        bill_counter += 1
-
-# Create DataFrame and save
-df = pd.DataFrame(data)
-df.to_csv("urbanmart_sales.csv", index=False)
-
-print(f"✅ Generated {len(df)} transactions")
-print(f"📅 Date range: {df['date'].min()} to {df['date'].max()}")
-print(f"🏪 Stores: {df['store_id'].unique().tolist()}")
-print(f"📦 Product categories: {df['product_category'].unique().tolist()}")
-print(f"\n✅ File saved: urbanmart_sales.csv")
\ No newline at end of file
+# Column order of the CSV
+COLUMNS = [
+    "transaction_id", "bill_id", "date", "store_id", "store_location",
+    "customer_id", "customer_segment", "product_id", "product_category",
+    "product_name", "quantity", "unit_price", "payment_method",
+    "discount_applied", "channel"
+]
+
+# ============================================
+# VECTORISED HELPERS
+# ============================================
+
+def format_ids(prefix, numbers, min_digits=4):
+    """
+    f"{prefix}{str(number).zfill(min_digits)}" for a whole array at once
+    (Arrow string kernels when pyarrow is installed, numpy.char otherwise)
+    """
+    numbers = np.asarray(numbers, dtype=np.int64)
+    if HAS_PYARROW:
+        digits = pc.utf8_lpad(pc.cast(pa.array(numbers), pa.string()), min_digits, '0')
+        return pd.Series(pc.binary_join_element_wise(prefix, digits, '').to_pandas(), dtype=str)
+    # numpy.char rather than numpy.strings, which needs NumPy >= 2.0
+    digits = np.char.zfill(numbers.astype(str), min_digits)
+    return pd.Series(np.char.add(prefix, digits), dtype=str)
+
+def bill_numbers(new_bill, first=first_bill):
+    """
+    Bill number of each row: the counter starts at `first` and moves on
+    after every row whose new_bill flag is set (like the original loop).
+    Returns (numbers, counter after the last row).
+    """
+    increments = np.cumsum(new_bill, dtype=np.int64)
+    numbers = first + np.concatenate([[0], increments[:-1]])
+    return numbers, first + int(increments[-1]) if len(increments) else first
+
+# ============================================
+# GENERATOR
+# ============================================
+
+def draw_block(rng, rows, days, first_row, bill):
+    """
+    Draw `rows` transactions as NumPy arrays in bulk and return them as a
+    DataFrame with the original schema, plus the bill counter after them.
+    first_row and bill are the first transaction number and bill number.
+    """
+    store_codes = rng.integers(0, len(stores), rows)
+    product_codes = rng.integers(0, len(products), rows)
+    has_discount = rng.random(rows) < discount_probability
+    discounts = np.where(has_discount, np.round(rng.uniform(0, 2, rows), 2), 0.0)
+    numbers, next_bill = bill_numbers(rng.random(rows) < new_bill_probability, bill)
+
+    store_table = pd.DataFrame(stores)
+    product_table = pd.DataFrame(products)
+    # Category names repeat across products: map product codes to category codes
+    category_codes, category_names = pd.factorize(product_table['product_category'])
+
+    df = pd.DataFrame({
+        "transaction_id": format_ids("TXN-2025-", np.arange(first_row, first_row + rows)),
+        "bill_id": format_ids("BILL-", numbers),
+        "date": pd.Categorical.from_codes(rng.integers(0, len(days), rows), categories=days, ordered=True),
+        "store_id": pd.Categorical.from_codes(store_codes, categories=store_table['store_id']),
+        "store_location": pd.Categorical.from_codes(store_codes, categories=store_table['store_location']),
+        "customer_id": pd.Categorical.from_codes(rng.integers(0, len(customer_ids), rows), categories=customer_ids),
+        "customer_segment": pd.Categorical.from_codes(rng.integers(0, len(customer_segments), rows), categories=customer_segments),
+        "product_id": pd.Categorical.from_codes(product_codes, categories=product_table['product_id']),
+        "product_category": pd.Categorical.from_codes(category_codes[product_codes], categories=category_names),
+        "product_name": pd.Categorical.from_codes(product_codes, categories=product_table['product_name']),
+        "quantity": rng.integers(1, 6, rows),
+        "unit_price": product_table['unit_price'].to_numpy()[product_codes],
+        "payment_method": pd.Categorical.from_codes(rng.integers(0, len(payment_methods), rows), categories=payment_methods),
+        "discount_applied": discounts,
+        "channel": pd.Categorical.from_codes(rng.integers(0, len(channels), rows), categories=channels)
+    })
+    return df[COLUMNS], next_bill
+
+def block_rng(seed, block):
+    """Independent, reproducible RNG stream of one block"""
+    return np.random.default_rng([seed, block])
+
+def iter_blocks(rows, seed=seed, start=start_date, end=end_date, blocks=None, bill=first_bill):
+    """
+    Yield the dataset block by block (BLOCK_ROWS rows each), carrying the
+    bill counter. blocks=(first, stop) limits the output to a block range.
+    """
+    days = pd.date_range(start, end, freq='D').strftime('%Y-%m-%d')
+    first, stop = blocks or (0, -(-rows // BLOCK_ROWS))
+    for block in range(first, stop):
+        block_start = block * BLOCK_ROWS
+        size = min(BLOCK_ROWS, rows - block_start)
+        df, bill = draw_block(block_rng(seed, block), size, days, block_start + 1, bill)
+        yield df
+
+def iter_chunks(rows, chunk_rows=CHUNK_ROWS, seed=seed, start=start_date, end=end_date, blocks=None, bill=first_bill):
+    """
+    Yield the dataset in frames of chunk_rows rows. The rows are the same
+    whatever chunk_rows is; at most one chunk plus one block is in memory.
+    """
+    pending = []
+    pending_rows = 0
+    for block in iter_blocks(rows, seed, start, end, blocks, bill):
+        pending.append(block)
+        pending_rows += len(block)
+        while pending_rows >= chunk_rows:
+            chunk = pd.concat(pending, ignore_index=True)
+            yield chunk.iloc[:chunk_rows]
+            rest = chunk.iloc[chunk_rows:]
+            pending = [rest] if len(rest) else []
+            pending_rows = len(rest)
+    if pending_rows:
+        yield pd.concat(pending, ignore_index=True)
+
+def generate_transactions(rows, seed=seed, start=start_date, end=end_date):
+    """The whole dataset as one DataFrame (same rows as the chunked writer)"""
+    return next(iter_chunks(rows, max(rows, 1), seed, start, end), pd.DataFrame(columns=COLUMNS))
+
+# ============================================
+# CHUNKED WRITERS
+# ============================================
+
+def output_format(path):
+    """csv / csv.gz / parquet, from the file name"""
+    for suffix, fmt in sorted(OUTPUT_FORMATS.items(), key=lambda item: -len(item[0])):
+        if path.endswith(suffix):
+            return fmt
+    return 'csv'
+
+class ChunkWriter:
+    """
+    Append chunks to one CSV, gzip CSV or Parquet file.
+    gzip output has a fixed header timestamp, so equal data gives equal bytes;
+    Parquet gets one row group per chunk. append=True continues an existing
+    CSV (or gzip CSV, as a new gzip member) without repeating the header;
+    Parquet files cannot be reopened for appending.
+    """
+
+    def __init__(self, path, fmt='csv', append=False):
+        self.path = path
+        self.format = fmt
+        self.rows = 0
+        self.header = not append
+        self.file = None
+        self.parquet = None
+        mode = 'a' if append else 'w'
+        if fmt == 'parquet':
+            if not HAS_PYARROW:
+                raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+            if append:
+                raise ValueError("Parquet files cannot be appended to")
+        elif fmt == 'csv.gz':
+            self.file = io.TextIOWrapper(gzip.GzipFile(path, mode + 'b', mtime=0), newline='')
+        else:
+            self.file = open(path, mode, newline='')
+
+    def write(self, chunk):
+        """Append one chunk"""
+        if self.format == 'parquet':
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self.parquet is None:
+                self.parquet = pq.ParquetWriter(self.path, table.schema)
+            self.parquet.write_table(table)
+        else:
+            chunk.to_csv(self.file, header=self.header, index=False)
+            self.header = False
+        self.rows += len(chunk)
+
+    def close(self):
+        """Flush and close the file"""
+        if self.parquet is not None:
+            self.parquet.close()
+        if self.file is not None:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def new_summary():
+    """Empty summary of a written dataset"""
+    return {'rows': 0, 'min_date': None, 'max_date': None, 'stores': set(), 'categories': set(), 'files': 0}
+
+def update_summary(summary, chunk):
+    """Fold one chunk (or another summary) into the summary"""
+    if isinstance(chunk, dict):
+        rows, dates = chunk['rows'], [chunk['min_date'], chunk['max_date']]
+        stores, categories = chunk['stores'], chunk['categories']
+        summary['files'] += chunk['files']
+    else:
+        rows, dates = len(chunk), ([chunk['date'].min(), chunk['date'].max()] if len(chunk) else [])
+        stores = chunk['store_id'].unique().tolist()
+        categories = chunk['product_category'].unique().tolist()
+    summary['rows'] += rows
+    dates = [date for date in dates + [summary['min_date'], summary['max_date']] if date]
+    if dates:
+        summary['min_date'], summary['max_date'] = min(dates), max(dates)
+    summary['stores'].update(stores)
+    summary['categories'].update(categories)
+    return summary
+
+def write_dataset(path, rows, chunk_rows=CHUNK_ROWS, fmt=None, seed=seed, start=start_date, end=end_date):
+    """
+    Generate and write the dataset chunk by chunk (peak memory depends on
+    chunk_rows, not rows). Returns a small summary of what was written.
+    """
+    summary = new_summary()
+    with ChunkWriter(path, fmt or output_format(path)) as writer:
+        for chunk in iter_chunks(rows, chunk_rows, seed, start, end):
+            writer.write(chunk)
+            update_summary(summary, chunk)
+    summary['files'] = 1
+    return summary
+
+# ============================================
+# SHARDED (PARALLEL) GENERATION
+# ============================================
+
+# File extension per output format
+FORMAT_EXTENSIONS = {fmt: suffix for suffix, fmt in OUTPUT_FORMATS.items()}
+
+def shard_ranges(rows, shards):
+    """Split the blocks into `shards` contiguous (first, stop) block ranges"""
+    blocks = -(-rows // BLOCK_ROWS)
+    bounds = np.linspace(0, blocks, min(shards, blocks) + 1).round().astype(int)
+    return [(int(first), int(stop)) for first, stop in zip(bounds[:-1], bounds[1:]) if stop > first]
+
+def partition_path(directory, keys, values, shard, fmt, piece=0):
+    """Hive-style path, e.g. out/store_id=S1/date=2025-01-01/part-00003.csv (part-00003-1.csv for piece 1)"""
+    parts = [f"{key}={value}" for key, value in zip(keys, values)]
+    name = f"part-{shard:05d}" + (f"-{piece}" if piece else "")
+    return os.path.join(directory, *parts, name + FORMAT_EXTENSIONS[fmt])
+
+def max_open_writers():
+    """MAX_OPEN_WRITERS, capped at half the soft RLIMIT_NOFILE (where known)"""
+    try:
+        import resource
+        soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    except (ImportError, ValueError, OSError):
+        return MAX_OPEN_WRITERS
+    if soft == resource.RLIM_INFINITY:
+        return MAX_OPEN_WRITERS
+    return max(1, min(MAX_OPEN_WRITERS, soft // 2))
+
+def write_shard(directory, shard, blocks, rows, partition_by, chunk_rows, fmt, seed, start, end,
+                max_open=None):
+    """
+    Generate one shard (a block range) and write it as one file per
+    partition. The shard's RNG streams are those of its blocks; its bill
+    numbers start at first_bill + its first row, so no two shards share
+    a bill (the counter moves at most once per row).
+    At most max_open partition files (default: max_open_writers()) are
+    open at once: the least recently written one is closed, and reopened
+    later in append mode (Parquet continues in a new part-NNNNN-<piece>
+    file instead).
+    """
+    first_row = blocks[0] * BLOCK_ROWS
+    max_open = max_open or max_open_writers()
+    summary = new_summary()
+    writers = OrderedDict()  # Open writers, least recently used first
+    pieces = {}  # Partition values -> files opened so far
+    paths = set()
+    try:
+        for chunk in iter_chunks(rows, chunk_rows, seed, start, end, blocks, first_bill + first_row):
+            groups = chunk.groupby(partition_by, observed=True, sort=False) if partition_by else [((), chunk)]
+            for values, part in groups:
+                values = values if isinstance(values, tuple) else (values,)
+                writer = writers.pop(values, None)
+                if writer is None:
+                    if len(writers) >= max_open:
+                        writers.popitem(last=False)[1].close()
+                    opened = pieces.get(values, 0)
+                    append = opened > 0 and fmt != 'parquet'
+                    path = partition_path(directory, partition_by, values, shard, fmt,
+                                          opened if fmt == 'parquet' else 0)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    writer = ChunkWriter(path, fmt, append)
+                    pieces[values] = opened + 1
+                    paths.add(path)
+                writers[values] = writer
+                writer.write(part)
+            update_summary(summary, chunk)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    summary['files'] = len(paths)
+    return summary
+
+def write_sharded_dataset(directory, rows, jobs=1, shards=None, partition_by=(), chunk_rows=CHUNK_ROWS,
+                          fmt='csv', seed=seed, start=start_date, end=end_date):
+    """
+    Generate the dataset as independent shards in a process pool and write
+    them as partitioned files under `directory`.
+    """
+    ranges = shard_ranges(rows, shards or jobs)
+    partition_by = list(partition_by)
+    tasks = [(directory, shard, blocks, rows, partition_by, chunk_rows, fmt, seed, start, end)
+             for shard, blocks in enumerate(ranges)]
+    summary = new_summary()
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for shard_summary in pool.map(write_shard, *zip(*tasks)):
+                update_summary(summary, shard_summary)
+    else:
+        for task in tasks:
+            update_summary(summary, write_shard(*task))
+    return summary
+
+# ============================================
+# MAIN EXECUTION
+# ============================================
+
+def main():
+    """Generate the dataset and save it as CSV"""
+    parser = argparse.ArgumentParser(description="Generate UrbanMart sample sales data")
+    parser.add_argument("--rows", type=int, default=num_transactions, help="number of transactions")
+    parser.add_argument("--seed", type=int, default=seed)
+    parser.add_argument("--start", default=start_date.strftime('%Y-%m-%d'), help="first date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=end_date.strftime('%Y-%m-%d'), help="last date (YYYY-MM-DD)")
+    parser.add_argument("--output", help="*.csv, *.csv.gz or *.parquet (default: urbanmart_sales.csv); "
+                                         "a directory in sharded mode")
+    parser.add_argument("--format", choices=sorted(set(OUTPUT_FORMATS.values())),
+                        help="output format (default: from the file extension)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS,
+                        help="rows generated and written per chunk (bounds memory)")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes (sharded mode)")
+    parser.add_argument("--shards", type=int, help="number of shards (default: --jobs)")
+    parser.add_argument("--partition-by", nargs="+", choices=["store_id", "date", "channel"],
+                        help="write --output as a directory partitioned by these columns")
+    args = parser.parse_args()
+
+    sharded = args.jobs > 1 or (args.shards or 1) > 1 or args.partition_by
+    if sharded:
+        if args.output is None:
+            parser.error("sharded mode (--jobs, --shards or --partition-by) needs --output DIRECTORY")
+        if os.path.exists(args.output) and not os.path.isdir(args.output):
+            parser.error(f"--output {args.output} is a file; sharded mode writes a directory")
+    elif args.output is None:
+        args.output = "urbanmart_sales.csv"
+    started = time.perf_counter()
+    if sharded:
+        summary = write_sharded_dataset(args.output, args.rows, args.jobs, args.shards, args.partition_by or (),
+                                        args.chunk_rows, args.format or 'csv', args.seed, args.start, args.end)
+    else:
+        summary = write_dataset(args.output, args.rows, args.chunk_rows, args.format,
+                                args.seed, args.start, args.end)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ Generated {summary['rows']:,} transactions in {elapsed:.2f} s")
+    print(f"📅 Date range: {summary['min_date']} to {summary['max_date']}")
+    print(f"🏪 Stores: {sorted(summary['stores'])}")
+    print(f"📦 Product categories: {sorted(summary['categories'])}")
+    if sharded:
+        print(f"\n✅ {summary['files']:,} files saved under: {args.output}/")
+    else:
+        print(f"\n✅ File saved: {args.output}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,337 @@
+import numpy as np
+import pandas as pd
+
+from urbanmart_data import select_columns, ensure_columns
+
+# ============================================
+# CUBE SETTINGS
+# ============================================
+
+# Dimensions kept in the cube (all sidebar filters + the date)
+CUBE_DIMENSIONS = ['store_location', 'channel', 'product_category', 'customer_segment', 'payment_method']
+
+# Additive measures - sums of sums are still correct after any filter
+CUBE_MEASURES = ['line_revenue', 'gross_revenue', 'total_discount', 'cost', 'profit', 'quantity']
+
+# ============================================
+# OLAP CUBE
+# ============================================
+
+def build_cube(df, dimensions=CUBE_DIMENSIONS, measures=CUBE_MEASURES):
+    """
+    Pre-aggregate the additive measures at day x dimensions grain.
+    The cube keeps the same column names as the row-level frame (plus a
+    'rows' count), so the sidebar filters apply to it unchanged.
+    Derived measures are computed for the build only, not kept on df.
+    """
+    grouped = select_columns(df, ['date'] + dimensions + measures).groupby(['date'] + dimensions, observed=True)
+    cube = grouped[measures].sum()
+    cube['rows'] = grouped.size()
+    cube = cube.reset_index()
+
+    # groupby sorts by the keys, so the cube is date-ordered like the rows
+    cube.attrs['fingerprint'] = f"{df.attrs.get('fingerprint', id(df))}:cube"
+    return cube
+
+def cube_totals(cube, measures=CUBE_MEASURES):
+    """Grand totals of the measures over the (filtered) cube (keeps integer sums integer)"""
+    return {column: cube[column].sum() for column in measures + ['rows']}
+
+def cube_group(cube, by, measures):
+    """
+    Answer a group-by over additive measures from the (filtered) cube.
+    Equivalent to df.groupby(by)[measures].sum().reset_index() on the rows.
+    """
+    return cube.groupby(by, observed=True)[measures].sum().reset_index()
+
+# ============================================
+# HYPERLOGLOG DISTINCT-COUNT SKETCHES
+# ============================================
+
+# 2**10 registers per sketch; typical error 1.04 / sqrt(1024) = 3.25%
+HLL_PRECISION = 10
+
+# Columns whose distinct counts can be approximated
+SKETCH_COLUMNS = ['transaction_id', 'customer_id']
+
+def hll_error(precision=HLL_PRECISION):
+    """Relative standard error of a HyperLogLog estimate"""
+    return 1.04 / np.sqrt(2 ** precision)
+
+def _bit_length(values):
+    """Bit length of each uint64 value (exact: each 32-bit half fits a float64)"""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+def hll_hash(values, precision=HLL_PRECISION):
+    """
+    (register, rank) of each value: values are hashed to 64 bits, the top
+    `precision` bits pick the register, the rest give the rank (position
+    of the leading 1 bit).
+    """
+    hashes = pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+    tail_bits = 64 - precision
+    register = (hashes >> np.uint64(tail_bits)).astype(np.int64)
+    tail = hashes & np.uint64((1 << tail_bits) - 1)
+    rank = (tail_bits - _bit_length(tail) + 1).astype(np.uint8)
+    return register, rank
+
+class CellSketches:
+    """
+    Sparse HyperLogLog sketches, one per cube cell: only the non-empty
+    registers are kept, as parallel (register, rank) arrays sorted by cell,
+    with offsets[c]:offsets[c + 1] the entries of cell c. A cell with r rows
+    costs at most r entries of 3 bytes instead of 2**precision bytes, and a
+    merge reads only the entries of the selected cells.
+    """
+
+    __slots__ = ('offsets', 'registers', 'ranks', 'precision')
+
+    def __init__(self, offsets, registers, ranks, precision):
+        self.offsets = offsets
+        self.registers = registers
+        self.ranks = ranks
+        self.precision = precision
+
+    @classmethod
+    def build(cls, values, cells, ncells, precision=HLL_PRECISION):
+        """Sketch `values` per cell code (rows with a negative cell code are skipped)"""
+        keep = cells >= 0
+        register, rank = hll_hash(np.asarray(values)[keep], precision)
+        key = cells[keep].astype(np.int64) << precision | register
+        order = np.argsort(key, kind='stable')
+        key = key[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.array([], dtype=np.int64)
+        ranks = np.maximum.reduceat(rank[order], starts) if len(key) else rank[:0]
+        key = key[starts]
+        offsets = np.searchsorted(key >> precision, np.arange(ncells + 1))
+        return cls(offsets, (key & ((1 << precision) - 1)).astype(np.uint16), ranks, precision)
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.registers.nbytes + self.ranks.nbytes
+
+    def merge(self, cells, labels=None):
+        """
+        Dense registers of the union of `cells`: one sketch, or with labels
+        (one per cell) a (labels, 2**precision) array, one row per code.
+        Returns (registers, label uniques).
+        """
+        cells = np.asarray(cells, dtype=np.int64)
+        starts = self.offsets[cells]
+        lengths = self.offsets[cells + 1] - starts
+        entries = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+
+        if labels is None:
+            merged, uniques = np.zeros((1, 2 ** self.precision), dtype=np.uint8), None
+            np.maximum.at(merged[0], self.registers[entries], self.ranks[entries])
+        else:
+            codes, uniques = pd.factorize(pd.Series(labels), sort=True)
+            merged = np.zeros((len(uniques), 2 ** self.precision), dtype=np.uint8)
+            np.maximum.at(merged, (np.repeat(codes, lengths), self.registers[entries]), self.ranks[entries])
+        return merged, uniques
+
+def hll_estimate(registers):
+    """Cardinality estimate for one sketch (1-D) or one per row (2-D)"""
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.exp2(-registers.astype(np.float64)).sum(axis=1)
+
+    # Small-range correction: linear counting while registers are still empty
+    zeros = (registers == 0).sum(axis=1)
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    estimate = np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+    return estimate if estimate.shape[0] > 1 else float(estimate[0])
+
+def build_distinct_sketches(df, columns=SKETCH_COLUMNS, dimensions=CUBE_DIMENSIONS, precision=HLL_PRECISION):
+    """
+    Sparse HyperLogLog sketches per cube cell, with cell codes aligned
+    row-for-row with build_cube(). Rows with a missing key are left out,
+    as they are from the cube. Returns {column: CellSketches}.
+    """
+    grouped = df.groupby(['date'] + dimensions, observed=True)
+    cells = grouped.ngroup().fillna(-1).to_numpy().astype(np.int64)
+    return {
+        column: CellSketches.build(df[column], cells, grouped.ngroups, precision)
+        for column in columns
+    }
+
+def approx_distinct(sketches, cells):
+    """Merge the sketches of the selected cube cells and estimate the distinct count"""
+    if len(cells) == 0:
+        return 0.0
+    return hll_estimate(sketches.merge(cells)[0][0])
+
+def approx_distinct_by(sketches, cells, labels):
+    """Distinct-count estimate per label (e.g. store_location of each selected cell)"""
+    if len(cells) == 0:
+        return pd.Series(dtype=float)
+    merged, uniques = sketches.merge(cells, labels)
+    return pd.Series(np.atleast_1d(hll_estimate(merged)), index=uniques)
+
+# ============================================
+# TIME ROLLUPS
+# ============================================
+
+def daily_rollup(df, measures):
+    """Sum the measures per day - the one scan every coarser grain is derived from"""
+    return select_columns(df, ['date'] + measures).groupby('date')[measures].sum()
+
+def time_rollup(daily, grain):
+    """
+    Derive a coarser grain from the daily table.
+    Period keys match the row-level columns (year/week from the ISO calendar,
+    'YYYY-MM' months, 'YYYYQn' quarters), so results equal a direct groupby.
+    """
+    if grain == 'Daily':
+        return daily.reset_index()
+
+    dates = daily.index.to_series()
+    if grain == 'Weekly':
+        keys = [dates.dt.year.rename('year'), dates.dt.isocalendar().week.rename('week')]
+    elif grain == 'Monthly':
+        keys = [dates.dt.to_period('M').astype(str).rename('year_month')]
+    elif grain == 'Quarterly':
+        keys = [dates.dt.to_period('Q').astype(str).rename('year_quarter')]
+    elif grain == 'Yearly':
+        keys = [dates.dt.year.rename('year')]
+    else:
+        raise ValueError(f"Unknown time grain: {grain}")
+
+    rolled = daily.groupby(keys).sum().reset_index()
+    if grain == 'Weekly':
+        rolled['period'] = rolled['year'].astype(str) + '-W' + rolled['week'].astype(str)
+    return rolled
+
+# ============================================
+# TOP-N SELECTION
+# ============================================
+
+def top_k(data, n, column=None, ascending=False, keep='first'):
+    """
+    The n largest (or smallest with ascending=True) entries of a Series, or
+    rows of a DataFrame by `column`, in sorted order.
+    Uses partial selection (np.partition) instead of a full sort, so the
+    cost is O(groups) plus O(n log n). Ties keep the earlier position first;
+    keep='all' also returns every entry tied with the last one.
+    Equivalent to data.sort_values(..., kind='stable').head(n).
+    """
+    values = (data if column is None else data[column]).to_numpy(dtype=float)
+    key = values if ascending else -values
+
+    if n <= 0:
+        return data.iloc[:0]
+    if n >= len(key) or np.isnan(key).any():
+        # Nothing to prune (or NaNs, which sort_values places last)
+        if column is None:
+            ordered = data.sort_values(ascending=ascending, kind='stable')
+        else:
+            ordered = data.sort_values(column, ascending=ascending, kind='stable')
+        return _with_ties(ordered, column, n) if keep == 'all' else ordered.head(n)
+
+    kth = np.partition(key, n - 1)[n - 1]
+    better = np.flatnonzero(key < kth)
+    tied = np.flatnonzero(key == kth)
+    if keep != 'all':
+        tied = tied[:n - len(better)]
+    chosen = np.concatenate([better, tied])
+    chosen = chosen[np.lexsort((chosen, key[chosen]))]
+    return data.iloc[chosen]
+
+def _with_ties(ordered, column, n):
+    """head(n) of an already sorted Series/DataFrame plus entries tied with the n-th"""
+    values = ordered if column is None else ordered[column]
+    if n >= len(values):
+        return ordered
+    last = values.iloc[n - 1]
+    return ordered.iloc[:n + int((values.iloc[n:] == last).sum())]
+
+def bottom_k(data, n, column=None, keep='first'):
+    """The n smallest entries - see top_k()"""
+    return top_k(data, n, column, ascending=True, keep=keep)
+
+# ============================================
+# AGGREGATION PLANNER
+# ============================================
+
+class AggregationPlan:
+    """
+    Collects the (keys, measures) aggregations a page needs and runs one
+    groupby pass per distinct key set.
+    Requests declared with request() before the first agg()/size() on the
+    same keys are merged into that single pass; later requests that need a
+    measure the pass did not compute trigger (and count) another scan.
+    Derived columns are materialised on the plan's own shallow copy of df
+    the first time a pass needs them, then reused for the rest of the page.
+    With a SectionTimer, every scan is recorded as a section.
+    """
+
+    def __init__(self, df, timer=None):
+        self.df = df.copy(deep=False)
+        self.timer = timer
+        self.pending = {}
+        self.results = {}
+        self.requests = 0
+        self.scans = 0
+
+    @staticmethod
+    def _key(keys):
+        """Hashable form of the group keys"""
+        return (keys,) if isinstance(keys, str) else tuple(keys)
+
+    @staticmethod
+    def _name(column, func):
+        """Internal output column name of one measure"""
+        return f"{column}|{func}"
+
+    def _size_measure(self):
+        """The {name: (column, 'size')} entry used for group sizes"""
+        column = self.df.columns[0]
+        return {self._name(column, 'size'): (column, 'size')}
+
+    def request(self, keys, measures, size=False):
+        """Declare an aggregation ({column: func}, optionally the group size) without running it yet"""
+        key = self._key(keys)
+        named = {self._name(column, func): (column, func) for column, func in measures.items()}
+        if size:
+            named.update(self._size_measure())
+        self.pending.setdefault(key, {}).update(named)
+
+    def _run(self, key, needed):
+        """Return the grouped result for key, scanning only when needed columns are missing"""
+        result = self.results.get(key)
+        if result is not None and all(name in result.columns for name in needed):
+            return result
+
+        named = dict(self.pending.pop(key, {}))
+        if result is not None:
+            named.update({name: tuple(name.split('|')) for name in result.columns})
+        named.update(needed)
+
+        group_keys = list(key) if len(key) > 1 else key[0]
+        timing = self.timer.start(f"groupby {', '.join(key)}", len(self.df)) if self.timer else None
+        ensure_columns(self.df, list(key) + [column for column, _ in named.values()])
+        result = self.df.groupby(group_keys, observed=True).agg(**named)
+        if timing is not None:
+            self.timer.stop(timing, len(result))
+        self.scans += 1
+        self.results[key] = result
+        return result
+
+    def agg(self, keys, measures):
+        """Equivalent of df.groupby(keys).agg(measures), served from the shared pass"""
+        self.requests += 1
+        needed = {self._name(column, func): (column, func) for column, func in measures.items()}
+        result = self._run(self._key(keys), needed)
+        columns = list(needed)
+        return result[columns].rename(columns={name: needed[name][0] for name in columns})
+
+    def size(self, keys):
+        """Equivalent of df.groupby(keys).size()"""
+        self.requests += 1
+        needed = self._size_measure()
+        result = self._run(self._key(keys), needed)
+        return result[next(iter(needed))].rename(None)
\ No newline at end of file
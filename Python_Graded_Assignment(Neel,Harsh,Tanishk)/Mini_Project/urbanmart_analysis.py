@@ -1,6 +1,21 @@
-import pandas as pd
+import os
 import csv
+import sys
+import json
+import weakref
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from urbanmart_compact import load_compact
+
+# pandas is needed for every mode except --compact (standard library only)
+try:
+    import pandas as pd
+    from urbanmart_aggregates import top_k
+    from urbanmart_data import encode_ids, fingerprint_file
+    HAS_PANDAS = True
+except ImportError:
+    HAS_PANDAS = False
 
 # ============================================
 # PART 1: Basic Python & Data Loading
@@ -25,10 +40,22 @@ def load_data_with_csv(filename):
         print(f"❌ Error: File '{filename}' not found!")
         return None
 
+def load_data_compact(filename):
+    """Load data with the csv module into compact array columns (no pandas)"""
+    try:
+        return load_compact(filename)
+    except FileNotFoundError:
+        print(f"❌ Error: File '{filename}' not found!")
+        return None
+
 def load_data_with_pandas(filename):
     """Load data using pandas (Option B - Preferred)"""
     try:
         df = pd.read_csv(filename)
+        # IDs become integers: transaction/bill numbers, customer/product codes
+        df = encode_ids(df)
+        # Content hash of the file - marks the loaded frame for KPI memoisation
+        df.attrs['fingerprint'] = fingerprint_file(filename)
         return df
     except FileNotFoundError:
         print(f"❌ Error: File '{filename}' not found!")
@@ -87,59 +114,191 @@ def demonstrate_data_structures(df):
 # PART 2: Functions & Simple KPIs
 # ============================================
 
+# KPI results per frame object (most recent frames only):
+# id(df) -> (weak reference to df, {key: result})
+KPI_CACHE_DATASETS = 4
+_kpi_cache = {}
+
+def _memoised(df, key, compute):
+    """
+    Return the cached result of compute() for this frame, computing it once.
+    Only frames carrying a fingerprint (set by load_data_with_pandas()) are
+    memoised, and they are treated as immutable. The memo belongs to the
+    frame object itself: pandas copies attrs onto derived frames (slices,
+    filters), so the fingerprint alone does not identify the rows.
+    """
+    if df.attrs.get('fingerprint') is None:
+        return compute()
+    entry = _kpi_cache.pop(id(df), None)
+    if entry is None or entry[0]() is not df:
+        # New frame (or a dead one whose id was reused)
+        entry = (weakref.ref(df), {})
+        while len(_kpi_cache) >= KPI_CACHE_DATASETS:
+            _kpi_cache.pop(next(iter(_kpi_cache)))
+    # Re-insert so the dict order is least -> most recently used
+    _kpi_cache[id(df)] = entry
+    results = entry[1]
+    if key not in results:
+        results[key] = compute()
+    return results[key]
+
+def line_revenue(df):
+    """
+    (quantity * unit_price) - discount_applied per row, computed once per
+    loaded frame and never written back to df
+    """
+    return _memoised(df, 'line_revenue',
+                     lambda: (df['quantity'] * df['unit_price']) - df['discount_applied'])
+
 def compute_total_revenue(df):
     """
     Returns total revenue = sum((quantity * unit_price) - discount_applied)
     """
-    df['line_revenue'] = (df['quantity'] * df['unit_price']) - df['discount_applied']
-    total_revenue = df['line_revenue'].sum()
-    return round(total_revenue, 2)
+    return _memoised(df, 'total_revenue', lambda: round(line_revenue(df).sum(), 2))
 
 def compute_revenue_by_store(df):
     """
     Returns a dictionary of store-wise revenue
     """
-    df['line_revenue'] = (df['quantity'] * df['unit_price']) - df['discount_applied']
-    revenue_by_store = df.groupby('store_location')['line_revenue'].sum().to_dict()
-    
-    # Round values
-    revenue_by_store = {k: round(v, 2) for k, v in revenue_by_store.items()}
-    return revenue_by_store
+    def compute():
+        revenue_by_store = line_revenue(df).groupby(df['store_location']).sum().to_dict()
+        # Round values
+        return {k: round(v, 2) for k, v in revenue_by_store.items()}
+    return dict(_memoised(df, 'revenue_by_store', compute))
 
 def compute_top_n_products(df, n=5):
     """
     Returns top n products by revenue
     """
-    df['line_revenue'] = (df['quantity'] * df['unit_price']) - df['discount_applied']
-    top_products = df.groupby('product_name')['line_revenue'].sum().sort_values(ascending=False).head(n)
-    return top_products.to_dict()
+    product_revenue = _memoised(df, 'product_revenue',
+                                lambda: line_revenue(df).groupby(df['product_name']).sum())
+    return dict(_memoised(df, ('top_products', n), lambda: top_k(product_revenue, n).to_dict()))
 
-def display_total_revenue(df):
-    """Display total revenue"""
-    total = compute_total_revenue(df)
+def print_total_revenue(total):
+    """Print a total revenue figure"""
     print("\n💰 TOTAL REVENUE")
     print("-" * 60)
     print(f"Total Revenue: ${total:,.2f}")
     print()
 
-def display_revenue_by_store(df):
-    """Display revenue by store"""
-    revenue_dict = compute_revenue_by_store(df)
+def print_revenue_by_store(revenue_dict):
+    """Print a store -> revenue dictionary"""
     print("\n🏪 REVENUE BY STORE")
     print("-" * 60)
     for store, revenue in revenue_dict.items():
         print(f"{store:20s}: ${revenue:,.2f}")
     print()
 
-def display_top_products(df, n=5):
-    """Display top N products"""
-    top_products = compute_top_n_products(df, n)
+def print_top_products(top_products, n=5):
+    """Print a product -> revenue dictionary as a ranking"""
     print(f"\n🏆 TOP {n} PRODUCTS BY REVENUE")
     print("-" * 60)
     for i, (product, revenue) in enumerate(top_products.items(), 1):
         print(f"{i}. {product:30s}: ${revenue:,.2f}")
     print()
 
+def display_total_revenue(df):
+    """Display total revenue"""
+    print_total_revenue(compute_total_revenue(df))
+
+def display_revenue_by_store(df):
+    """Display revenue by store"""
+    print_revenue_by_store(compute_revenue_by_store(df))
+
+def display_top_products(df, n=5):
+    """Display top N products"""
+    print_top_products(compute_top_n_products(df, n), n)
+
+# ============================================
+# PART 3: Streaming KPIs (bounded memory)
+# ============================================
+
+# Rows per chunk in streaming mode
+CHUNK_SIZE = 100_000
+
+# The only columns the revenue KPIs read
+KPI_COLUMNS = ['date', 'store_id', 'store_location', 'product_name', 'quantity', 'unit_price', 'discount_applied']
+
+def iter_sales_chunks(filename, chunk_size=CHUNK_SIZE):
+    """Yield the CSV as DataFrames of at most chunk_size rows (KPI columns only)"""
+    with pd.read_csv(filename, usecols=KPI_COLUMNS, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            yield chunk
+
+class StreamingKPIs:
+    """
+    Running accumulators for the revenue KPIs, folded one chunk at a time.
+    Memory is bounded by the number of stores and products, not by rows,
+    so files larger than RAM can be reported on. Per-product totals are
+    kept (the catalogue is small), which keeps the top-N exact.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.total_revenue = 0.0
+        self.store_revenue = pd.Series(dtype=float)
+        self.product_revenue = pd.Series(dtype=float)
+        self.store_ids = set()
+        self.min_date = None
+        self.max_date = None
+
+    def update(self, chunk):
+        """Fold one chunk into the running totals"""
+        line_revenue = (chunk['quantity'] * chunk['unit_price']) - chunk['discount_applied']
+        self.rows += len(chunk)
+        self.total_revenue += line_revenue.sum()
+        self.store_revenue = self.store_revenue.add(
+            line_revenue.groupby(chunk['store_location']).sum(), fill_value=0)
+        self.product_revenue = self.product_revenue.add(
+            line_revenue.groupby(chunk['product_name']).sum(), fill_value=0)
+
+        self.store_ids.update(chunk['store_id'].unique().tolist())
+        # ISO dates compare correctly as strings
+        dates = chunk['date'].dropna()
+        if len(dates):
+            self.min_date = min(filter(None, [self.min_date, dates.min()]))
+            self.max_date = max(filter(None, [self.max_date, dates.max()]))
+        return self
+
+    def merge(self, other):
+        """Fold another set of accumulators (e.g. another file's) into these"""
+        self.rows += other.rows
+        self.total_revenue += other.total_revenue
+        self.store_revenue = self.store_revenue.add(other.store_revenue, fill_value=0)
+        self.product_revenue = self.product_revenue.add(other.product_revenue, fill_value=0)
+        self.store_ids.update(other.store_ids)
+        self.min_date = min(filter(None, [self.min_date, other.min_date]), default=None)
+        self.max_date = max(filter(None, [self.max_date, other.max_date]), default=None)
+        return self
+
+    def total(self):
+        """Same result as compute_total_revenue()"""
+        return round(self.total_revenue, 2)
+
+    def revenue_by_store(self):
+        """Same result as compute_revenue_by_store()"""
+        return {k: round(v, 2) for k, v in self.store_revenue.sort_index().items()}
+
+    def top_products(self, n=5):
+        """Same result as compute_top_n_products()"""
+        return top_k(self.product_revenue.sort_index(), n).to_dict()
+
+def compute_streaming_kpis(filename, chunk_size=CHUNK_SIZE):
+    """One pass over the file, holding a single chunk in memory at a time"""
+    kpis = StreamingKPIs()
+    for chunk in iter_sales_chunks(filename, chunk_size):
+        kpis.update(chunk)
+    return kpis
+
+def streaming_sanity_checks(kpis):
+    """basic_sanity_checks() from the streaming accumulators"""
+    print("\n📊 BASIC SANITY CHECKS (streaming)")
+    print("-" * 60)
+    print(f"Total number of rows: {kpis.rows}")
+    print(f"Unique store IDs: {sorted(kpis.store_ids)}")
+    print(f"Date range: {kpis.min_date} to {kpis.max_date}")
+    print()
+
 # ============================================
 # PART 2: CLI Menu with Error Handling
 # ============================================
@@ -155,8 +314,12 @@ def display_menu():
     print("4. Exit")
     print("=" * 60)
 
-def run_cli_menu(df):
-    """Run the interactive CLI menu"""
+def run_cli_menu(df, kpis=None):
+    """
+    Run the interactive CLI menu.
+    kpis (streaming accumulators or a compact table) answers the menu
+    instead of df when given.
+    """
     while True:
         display_menu()
         
@@ -164,11 +327,20 @@ def run_cli_menu(df):
             choice = input("\nEnter your choice (1-4): ").strip()
             
             if choice == '1':
-                display_total_revenue(df)
+                if kpis is not None:
+                    print_total_revenue(kpis.total())
+                else:
+                    display_total_revenue(df)
             elif choice == '2':
-                display_revenue_by_store(df)
+                if kpis is not None:
+                    print_revenue_by_store(kpis.revenue_by_store())
+                else:
+                    display_revenue_by_store(df)
             elif choice == '3':
-                display_top_products(df, 5)
+                if kpis is not None:
+                    print_top_products(kpis.top_products(5), 5)
+                else:
+                    display_top_products(df, 5)
             elif choice == '4':
                 print("\n👋 Thank you for using UrbanMart Analytics!")
                 print("=" * 60)
@@ -183,16 +355,166 @@ def run_cli_menu(df):
             print(f"\n❌ An error occurred: {e}")
             print("Please try again.")
 
+# ============================================
+# PART 4: Batch Reports (non-interactive)
+# ============================================
+
+# Subcommand -> KPIs it reports
+BATCH_COMMANDS = {
+    'total': ['total_revenue'],
+    'by-store': ['revenue_by_store'],
+    'top': ['top_products'],
+    'all': ['total_revenue', 'revenue_by_store', 'top_products']
+}
+
+def kpi_report(kpis, metrics, n=5):
+    """The requested KPIs from one set of accumulators, as plain JSON-ready values"""
+    report = {'rows': kpis.rows}
+    if 'total_revenue' in metrics:
+        report['total_revenue'] = float(kpis.total())
+    if 'revenue_by_store' in metrics:
+        report['revenue_by_store'] = {store: float(v) for store, v in kpis.revenue_by_store().items()}
+    if 'top_products' in metrics:
+        report['top_products'] = [
+            {'rank': rank, 'product': product, 'revenue': round(float(revenue), 2)}
+            for rank, (product, revenue) in enumerate(kpis.top_products(n).items(), 1)
+        ]
+    return report
+
+def batch_file_report(filename, kpis, metrics, n=5):
+    """Every requested KPI for one file, from its streaming accumulators"""
+    return {'file': filename, **kpi_report(kpis, metrics, n)}
+
+def batch_combined_report(file_kpis, metrics, n=5):
+    """The KPIs over all files together, merged from the per-file accumulators (no second pass)"""
+    kpis = StreamingKPIs()
+    for other in file_kpis:
+        kpis.merge(other)
+    return {'file': 'combined', **kpi_report(kpis, metrics, n)}
+
+def report_rows(report):
+    """Flatten one report into (file, metric, rank, key, value) CSV rows"""
+    rows = [(report['file'], 'rows', '', '', report['rows'])]
+    if 'total_revenue' in report:
+        rows.append((report['file'], 'total_revenue', '', '', report['total_revenue']))
+    for store, revenue in report.get('revenue_by_store', {}).items():
+        rows.append((report['file'], 'revenue_by_store', '', store, revenue))
+    for entry in report.get('top_products', []):
+        rows.append((report['file'], 'top_products', entry['rank'], entry['product'], entry['revenue']))
+    return rows
+
+def write_reports(reports, output_format, out):
+    """Write the reports as JSON (a list) or long-format CSV"""
+    if output_format == 'json':
+        json.dump(reports, out, indent=2)
+        out.write("\n")
+    else:
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(['file', 'metric', 'rank', 'key', 'value'])
+        for report in reports:
+            writer.writerows(report_rows(report))
+
+def run_batch(argv):
+    """Run a batch subcommand; returns the process exit code"""
+    parser = argparse.ArgumentParser(
+        prog="urbanmart_analysis.py",
+        description="UrbanMart batch KPI reports (one streaming pass per file)"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command, metrics in BATCH_COMMANDS.items():
+        sub = subparsers.add_parser(command, help=f"report {', '.join(metrics)}")
+        sub.add_argument("files", nargs="+", help="sales CSV files (one report each)")
+        if 'top_products' in metrics:
+            sub.add_argument("--n", type=int, default=5, help="number of top products")
+        sub.add_argument("--format", choices=["json", "csv"], default="json")
+        sub.add_argument("--output", help="write to this file instead of stdout")
+        sub.add_argument("--combined", action="store_true",
+                         help="also report all files folded together")
+        sub.add_argument("--jobs", type=int, default=1, help="files processed in parallel")
+        sub.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    metrics = BATCH_COMMANDS[args.command]
+    n = getattr(args, 'n', 5)
+    missing = [filename for filename in args.files if not os.path.exists(filename)]
+    if missing:
+        for filename in missing:
+            print(f"❌ Error: File '{filename}' not found!", file=sys.stderr)
+        return 1
+
+    # One streaming pass per file; workers send back their accumulators
+    if args.jobs > 1 and len(args.files) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            file_kpis = list(pool.map(compute_streaming_kpis, args.files, [args.chunk_size] * len(args.files)))
+    else:
+        file_kpis = [compute_streaming_kpis(filename, args.chunk_size) for filename in args.files]
+    reports = [batch_file_report(filename, kpis, metrics, n) for filename, kpis in zip(args.files, file_kpis)]
+    if args.combined:
+        reports.append(batch_combined_report(file_kpis, metrics, n))
+
+    if args.output:
+        with open(args.output, 'w', newline='') as out:
+            write_reports(reports, args.format, out)
+    else:
+        write_reports(reports, args.format, sys.stdout)
+    return 0
+
 # ============================================
 # MAIN EXECUTION
 # ============================================
 
-def main():
-    """Main function to run the analysis"""
+def main(argv=None):
+    """Main function to run the analysis (interactive menu, or a batch subcommand)"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in BATCH_COMMANDS:
+        if not HAS_PANDAS:
+            print("❌ Error: batch reports need pandas (pip install pandas)", file=sys.stderr)
+            return 1
+        return run_batch(argv)
+
+    parser = argparse.ArgumentParser(
+        description="UrbanMart sales analysis CLI",
+        epilog=f"batch mode: urbanmart_analysis.py {{{','.join(BATCH_COMMANDS)}}} FILE [FILE ...] --format json|csv"
+    )
+    parser.add_argument("filename", nargs="?", default="urbanmart_sales.csv")
+    parser.add_argument("--stream", action="store_true",
+                        help="read the file in chunks with bounded memory (for files larger than RAM)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--compact", action="store_true",
+                        help="load with the csv module into compact array columns instead of pandas")
+    args = parser.parse_args(argv)
+    if not (args.compact or HAS_PANDAS):
+        print("❌ Error: pandas is not installed - install it (pip install pandas) or use --compact")
+        return 1
+
     welcome_message()
     
     # Load data
-    filename = "urbanmart_sales.csv"
+    filename = args.filename
+
+    if args.stream:
+        print(f"📂 Streaming data from {filename} ({args.chunk_size:,} rows per chunk)...")
+        try:
+            kpis = compute_streaming_kpis(filename, args.chunk_size)
+        except FileNotFoundError:
+            print(f"❌ Error: File '{filename}' not found!")
+            print("\n❌ Cannot proceed without data. Exiting...")
+            return
+        print(f"✅ Data streamed successfully!\n")
+        streaming_sanity_checks(kpis)
+        run_cli_menu(None, kpis)
+        return
+
+    if args.compact:
+        print(f"📂 Loading data from {filename} (compact columns)...")
+        table = load_data_compact(filename)
+        if table is None:
+            print("\n❌ Cannot proceed without data. Exiting...")
+            return
+        print(f"✅ Data loaded successfully! ({len(table)} rows)\n")
+        run_cli_menu(None, table)
+        return
+
     print(f"📂 Loading data from {filename}...")
     
     df = load_data_with_pandas(filename)
@@ -213,4 +535,4 @@ def main():
     run_cli_menu(df)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,879 @@
+import os
+import gc
+import sys
+import csv
+import json
+import pickle
+import threading
+import platform
+import argparse
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+try:
+    import plotly.express as px
+    import plotly.graph_objects as go
+    HAS_PLOTLY = True
+except ImportError:
+    HAS_PLOTLY = False
+
+from urbanmart_data import (
+    SALES_FILE, HAS_PYARROW, read_sales_csv, add_derived_columns, parse_dates, sort_by_date,
+    to_categorical, encode_ids, select_columns, write_cache, read_cache,
+    memory_report, derived_column, DERIVED_COLUMNS, DERIVED_ALIASES, CALENDAR_COLUMNS
+)
+from urbanmart_filters import filter_frame, build_bitmap_index, count_rows
+from urbanmart_aggregates import (
+    top_k, bottom_k, build_cube, cube_totals, cube_group, daily_rollup, time_rollup,
+    build_distinct_sketches, approx_distinct, hll_error, AggregationPlan, CUBE_MEASURES
+)
+from urbanmart_compact import load_compact
+from generate_sample_data import generate_transactions
+
+# ============================================
+# BENCHMARK DATA
+# ============================================
+
+def make_benchmark_frame(rows, filename=SALES_FILE, seed=42, typed=True):
+    """
+    Build an enriched frame of `rows` rows by resampling the sample CSV.
+    Dates are spread over a full year so date filters are selective.
+    """
+    base = read_sales_csv(filename)
+    rng = np.random.default_rng(seed)
+
+    df = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+    days = rng.integers(0, 365, rows)
+    df['date'] = (pd.Timestamp("2025-01-01") + pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d')
+
+    df = sort_by_date(add_derived_columns(df))
+    if typed:
+        df = to_categorical(df)
+    return df
+
+def write_benchmark_csv(rows, path, filename=SALES_FILE, seed=42):
+    """Write a resampled CSV with the original columns and date format"""
+    columns = read_sales_csv(filename).columns
+    df = make_benchmark_frame(rows, filename, seed, typed=False)[columns]
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    df.to_csv(path, index=False)
+    return path
+
+def traced_memory(func):
+    """Return (bytes still allocated by func's result, peak bytes, result) via tracemalloc"""
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak, result
+
+def time_call(func, repeat=3):
+    """Return (best seconds, last result) over `repeat` calls"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+# ============================================
+# FILTER BENCHMARK
+# ============================================
+
+def legacy_apply_filters(df, custom_start, custom_end, stores, channel, categories, segments, payment_methods):
+    """The original app.py filter chain (full copy + one pass per filter), kept as a baseline"""
+    filtered_df = df.copy()
+
+    filtered_df = filtered_df[
+        (filtered_df['date'] >= pd.to_datetime(custom_start)) &
+        (filtered_df['date'] <= pd.to_datetime(custom_end))
+    ]
+
+    if stores:
+        filtered_df = filtered_df[filtered_df['store_location'].isin(stores)]
+
+    if channel != "All":
+        filtered_df = filtered_df[filtered_df['channel'] == channel]
+
+    if categories:
+        filtered_df = filtered_df[filtered_df['product_category'].isin(categories)]
+
+    if segments:
+        filtered_df = filtered_df[filtered_df['customer_segment'].isin(segments)]
+
+    if payment_methods:
+        filtered_df = filtered_df[filtered_df['payment_method'].isin(payment_methods)]
+
+    return filtered_df
+
+def filter_scenarios(df):
+    """Typical sidebar states: the defaults and a narrow selection"""
+    all_values = lambda column: sorted(df[column].unique().tolist())
+    return {
+        "defaults (all selected)": dict(
+            start=df['date'].min(), end=df['date'].max(),
+            stores=all_values('store_location'), channel="All",
+            categories=all_values('product_category'),
+            segments=all_values('customer_segment'),
+            payment_methods=all_values('payment_method')
+        ),
+        "narrow (1 month, 2 stores, Online, 1 category)": dict(
+            start="2025-03-01", end="2025-03-31",
+            stores=["Downtown", "Uptown"], channel="Online",
+            categories=["Snacks"],
+            segments=all_values('customer_segment'),
+            payment_methods=all_values('payment_method')
+        )
+    }
+
+def predicate_scenarios(df):
+    """One sidebar predicate restricted at a time (the rest left at their defaults)"""
+    first = lambda column: sorted(df[column].unique().tolist())[:1]
+    start, end = df['date'].min(), df['date'].max()
+    return {
+        'filter_date': dict(start=start + pd.Timedelta(days=59), end=start + pd.Timedelta(days=89)),
+        'filter_store': dict(start=start, end=end, stores=first('store_location')),
+        'filter_channel': dict(start=start, end=end, channel="Online"),
+        'filter_category': dict(start=start, end=end, categories=first('product_category')),
+        'filter_segment': dict(start=start, end=end, segments=first('customer_segment')),
+        'filter_payment': dict(start=start, end=end, payment_methods=first('payment_method'))
+    }
+
+def benchmark_filters(sizes, repeat=3):
+    """Time the legacy filter chain against the single-mask and bitmap engines"""
+    print("\n⏱️ FILTER BENCHMARK (legacy chain vs single mask vs bitmaps)")
+    print("-" * 60)
+    for rows in sizes:
+        df = make_benchmark_frame(rows)
+        build_time, bitmap_index = time_call(lambda: build_bitmap_index(df), 1)
+        print(f"\n{rows:,} rows (bitmap index built in {build_time * 1000:.1f} ms)")
+        for name, spec in filter_scenarios(df).items():
+            legacy_time, legacy_result = time_call(lambda: legacy_apply_filters(
+                df, spec['start'], spec['end'], spec['stores'], spec['channel'],
+                spec['categories'], spec['segments'], spec['payment_methods']), repeat)
+            mask_time, mask_result = time_call(lambda: filter_frame(df, **spec), repeat)
+            bitmap_time, bitmap_result = time_call(
+                lambda: filter_frame(df, **spec, bitmap_index=bitmap_index), repeat)
+            count_time, count = time_call(
+                lambda: count_rows(df, **spec, bitmap_index=bitmap_index), repeat)
+
+            assert legacy_result.index.equals(mask_result.index), "filter results differ"
+            assert legacy_result.index.equals(bitmap_result.index), "bitmap results differ"
+            assert count == len(legacy_result), "bitmap count differs"
+            print(f"  {name}: {len(mask_result):,} rows")
+            print(f"    legacy {legacy_time * 1000:9.1f} ms | mask {mask_time * 1000:9.1f} ms | "
+                  f"bitmap {bitmap_time * 1000:9.1f} ms | count only {count_time * 1000:7.2f} ms")
+    print()
+
+# ============================================
+# TOP-N BENCHMARK
+# ============================================
+
+def benchmark_top_k(group_counts, n=10, repeat=3, seed=42):
+    """Time sort_values().head(n) against partial selection at high group cardinality"""
+    print(f"\n⏱️ TOP-{n} BENCHMARK (full sort vs partial selection)")
+    print("-" * 60)
+    rng = np.random.default_rng(seed)
+    for groups in group_counts:
+        # Per-group revenue totals, as returned by groupby('product_name'/'customer_id').sum()
+        totals = pd.Series(
+            rng.gamma(2.0, 50.0, groups).round(2),
+            index=pd.Index(np.arange(groups)).astype(str)
+        )
+        sort_time, expected = time_call(lambda: totals.sort_values(ascending=False, kind='stable').head(n), repeat)
+        topk_time, result = time_call(lambda: top_k(totals, n), repeat)
+
+        assert expected.equals(result), "top-k result differs"
+        print(f"  {groups:>12,} groups | sort+head {sort_time * 1000:9.2f} ms | "
+              f"top_k {topk_time * 1000:8.2f} ms | {sort_time / topk_time:6.1f}x")
+    print()
+
+# ============================================
+# DISTINCT-COUNT BENCHMARK
+# ============================================
+
+def benchmark_distinct(sizes, repeat=3, seed=42):
+    """Time exact nunique against merged HyperLogLog sketches, and report the error"""
+    print(f"\n⏱️ DISTINCT-COUNT BENCHMARK (exact nunique vs HyperLogLog, expected error ±{hll_error():.1%})")
+    print("-" * 60)
+    rng = np.random.default_rng(seed)
+    for rows in sizes:
+        df = make_benchmark_frame(rows, seed=seed)
+        # Realistic cardinalities: unique transactions, ~rows/10 customers
+        df['transaction_id'] = pd.Series(np.arange(rows)).map('TXN-{:09d}'.format)
+        df['customer_id'] = pd.Series(rng.integers(0, max(rows // 10, 1), rows)).map('C{:07d}'.format)
+
+        cube = build_cube(df)
+        build_time, sketches = time_call(lambda: build_distinct_sketches(df), 1)
+        print(f"\n{rows:,} rows | {len(cube):,} cube cells | sketches built in {build_time:.2f} s")
+
+        for name, spec in filter_scenarios(df).items():
+            rows_filtered = filter_frame(df, **spec)
+            cells = filter_frame(cube, **spec).index.to_numpy()
+            for column in ['transaction_id', 'customer_id']:
+                exact_time, exact = time_call(lambda: rows_filtered[column].nunique(), repeat)
+                approx_time, estimate = time_call(lambda: approx_distinct(sketches[column], cells), repeat)
+                error = (estimate - exact) / exact if exact else 0.0
+                print(f"  {name[:30]:30s} {column:15s} exact {exact:>10,} in {exact_time * 1000:8.1f} ms | "
+                      f"hll {estimate:>12,.0f} in {approx_time * 1000:7.1f} ms | error {error:+.2%}")
+    print()
+
+# ============================================
+# PURE-PYTHON CSV LOADER BENCHMARK
+# ============================================
+
+def load_dict_rows(path):
+    """The original load_data_with_csv(): one dict of strings per row"""
+    with open(path, 'r') as file:
+        return list(csv.DictReader(file))
+
+def dict_rows_total(data):
+    """Total revenue over the DictReader rows"""
+    return round(sum(int(row['quantity']) * float(row['unit_price']) - float(row['discount_applied'])
+                     for row in data), 2)
+
+def benchmark_csv_loaders(sizes, repeat=1):
+    """Memory and load time of the DictReader list against the compact columnar table"""
+    print("\n⏱️ CSV LOADER BENCHMARK (DictReader list vs compact arrays, no pandas)")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = write_benchmark_csv(rows, os.path.join(tmp, f"sales_{rows}.csv"))
+            print(f"\n{rows:,} rows ({os.path.getsize(path) / 1e6:.1f} MB CSV)")
+            for name, load, total in [
+                ("DictReader list", load_dict_rows, dict_rows_total),
+                ("compact arrays", load_compact, lambda table: table.total())
+            ]:
+                load_time, data = time_call(lambda: load(path), repeat)
+                kpi_time, revenue = time_call(lambda: total(data), repeat)
+                del data
+                held, peak, data = traced_memory(lambda: load(path))
+                del data
+                print(f"  {name:16s} load {load_time:6.2f} s ({rows / load_time:>10,.0f} rows/s) | "
+                      f"held {held / 1e6:8.1f} MB ({held / rows:6.0f} B/row) | peak {peak / 1e6:8.1f} MB | "
+                      f"total revenue {revenue:,.2f} in {kpi_time * 1000:.0f} ms")
+    print()
+
+# ============================================
+# PIPELINE SUITE
+# ============================================
+
+# Suite sizes and the stages timed at each size, in pipeline order
+SUITE_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+SUITE_STAGES = [
+    'generate', 'write_csv', 'read_csv', 'prepare', 'cache_write', 'cache_read',
+    'derive', 'bitmap_index', 'filter_defaults', 'filter_narrow',
+    'filter_date', 'filter_store', 'filter_channel', 'filter_category', 'filter_segment', 'filter_payment',
+    'cube', 'groupby', 'top_k', 'sketches',
+    'page_overview', 'page_sales', 'page_customers', 'page_products', 'page_stores',
+    'page_channels', 'page_profitability', 'figures'
+]
+
+def page_aggregations(df, cube):
+    """
+    The aggregation set of each dashboard page (exact counts, no filters),
+    one function per page. Each runs its own AggregationPlan like a render
+    does, and returns the tables the page's charts are built from.
+    """
+    def overview():
+        return {
+            'kpis': cube_totals(cube),
+            'transactions': df['transaction_id'].nunique(),
+            'customers': df['customer_id'].nunique(),
+            'trend': time_rollup(daily_rollup(cube, ['line_revenue', 'profit']), "Daily"),
+            **{column: cube_group(cube, column, ['line_revenue', 'profit'])
+               for column in ['product_category', 'store_location', 'channel', 'customer_segment', 'payment_method']}
+        }
+
+    def sales():
+        plan = AggregationPlan(df)
+        products = plan.agg('product_name', {'line_revenue': 'sum', 'quantity': 'sum', 'profit': 'sum'})
+        return {
+            'kpis': cube_totals(cube),
+            'days': plan.agg('day_of_week', {'line_revenue': 'sum', 'transaction_id': 'nunique'}),
+            'top': top_k(products, 10, 'line_revenue'),
+            'bottom': bottom_k(products, 10, 'line_revenue')
+        }
+
+    def customers():
+        plan = AggregationPlan(df)
+        plan.request('customer_id', {'line_revenue': 'sum', 'profit': 'sum',
+                                     'transaction_id': 'nunique', 'customer_segment': 'last'}, size=True)
+        return {
+            'customers': df['customer_id'].nunique(),
+            'transactions': df['transaction_id'].nunique(),
+            'value': plan.agg('customer_id', {'line_revenue': 'sum'})['line_revenue'].mean(),
+            'repeat': (plan.size('customer_id') > 1).sum(),
+            'segments': plan.agg('customer_segment', {'customer_id': 'nunique', 'line_revenue': 'sum',
+                                                      'profit': 'sum', 'transaction_id': 'nunique'}),
+            'top': top_k(plan.agg('customer_id', {'line_revenue': 'sum', 'profit': 'sum',
+                                                  'transaction_id': 'nunique', 'customer_segment': 'last'}),
+                         20, 'line_revenue'),
+            'baskets': plan.agg(['customer_segment', 'bill_id'], {'line_revenue': 'sum'}),
+            'products': plan.size(['customer_segment', 'transaction_id'])
+        }
+
+    def products():
+        plan = AggregationPlan(df)
+        product_profit = plan.agg('product_name', {'profit': 'sum', 'line_revenue': 'sum', 'quantity': 'sum'})
+        return {
+            'products': df['product_id'].nunique(),
+            'unit_price': df['unit_price'].mean(),
+            'units': plan.agg('transaction_id', {'quantity': 'sum'})['quantity'].mean(),
+            'categories': plan.agg('product_category', {'line_revenue': 'sum', 'profit': 'sum', 'quantity': 'sum',
+                                                        'transaction_id': 'nunique', 'total_discount': 'sum'}),
+            'top': top_k(product_profit, 10, 'profit'),
+            'bottom': bottom_k(product_profit, 10, 'profit')
+        }
+
+    def stores():
+        plan = AggregationPlan(df)
+        return {
+            'stores': plan.agg('store_location', {'line_revenue': 'sum', 'profit': 'sum', 'transaction_id': 'nunique',
+                                                  'customer_id': 'nunique', 'quantity': 'sum'}),
+            'categories': cube_group(cube, ['store_location', 'product_category'], ['line_revenue'])
+        }
+
+    def channels():
+        plan = AggregationPlan(df)
+        return {
+            'channels': plan.agg('channel', {'line_revenue': 'sum', 'profit': 'sum',
+                                             'transaction_id': 'nunique', 'customer_id': 'nunique'}),
+            'payments': plan.agg('payment_method', {'line_revenue': 'sum', 'transaction_id': 'nunique',
+                                                    'customer_id': 'nunique'}),
+            'cross': cube_group(cube, ['channel', 'payment_method'], ['line_revenue'])
+        }
+
+    def profitability():
+        return {
+            'kpis': cube_totals(cube),
+            'trend': time_rollup(daily_rollup(cube, ['line_revenue', 'cost', 'profit']), "Daily"),
+            **{column: cube_group(cube, column, ['line_revenue', 'cost', 'profit'])
+               for column in ['product_category', 'store_location', 'channel', 'customer_segment']}
+        }
+
+    return {
+        'page_overview': overview, 'page_sales': sales, 'page_customers': customers,
+        'page_products': products, 'page_stores': stores, 'page_channels': channels,
+        'page_profitability': profitability
+    }
+
+def build_figures(tables):
+    """Build (but do not render) the Executive Overview's Plotly figures from its tables"""
+    trend = tables['trend']
+    fig_trend = go.Figure()
+    for column in ['line_revenue', 'profit']:
+        fig_trend.add_trace(go.Scatter(x=trend['date'], y=trend[column], name=column, mode='lines+markers'))
+    fig_trend.update_layout(hovermode='x unified', height=400)
+    figures = [fig_trend]
+    for column in ['product_category', 'store_location']:
+        fig = px.bar(tables[column], x='line_revenue', y=column, orientation='h', color='profit',
+                     color_continuous_scale=['red', 'yellow', 'green'], text='line_revenue')
+        fig.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
+        figures.append(fig)
+    for column in ['channel', 'customer_segment', 'payment_method']:
+        fig = px.pie(tables[column], values='line_revenue', names=column, hole=0.4)
+        fig.update_traces(textposition='inside', textinfo='percent+label')
+        figures.append(fig)
+    return figures
+
+def machine_info():
+    """Where the numbers come from: hardware, interpreter and library versions"""
+    info = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'pyarrow': None
+    }
+    try:
+        info['memory_bytes'] = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        info['memory_bytes'] = None
+    if HAS_PYARROW:
+        import pyarrow
+        info['pyarrow'] = pyarrow.__version__
+    try:
+        info['git_commit'] = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        info['git_commit'] = None
+    return info
+
+def run_suite_size(rows, stages, repeat, workdir, seed=42):
+    """
+    Run the pipeline once at `rows` rows, timing each stage (best of
+    `repeat`); every stage feeds the next, as in the dashboard.
+    Returns one result dict per stage.
+    """
+    results = []
+    csv_path = os.path.join(workdir, f"sales_{rows}.csv")
+    cache_path = os.path.join(workdir, f"sales_{rows}.arrow")
+
+    def stage(name, func, rows_in, repeat=repeat, needed=False):
+        """Time func if the stage is selected; otherwise run it untimed only when later stages need it"""
+        if name not in stages:
+            return func() if needed else None
+        seconds, result = time_call(func, repeat)
+        results.append({
+            'rows': rows, 'stage': name, 'seconds': seconds,
+            'rows_per_second': rows_in / seconds if seconds > 0 else None
+        })
+        return result
+
+    # Data source: generated in memory and round-tripped through a CSV
+    generated = stage('generate', lambda: generate_transactions(rows, seed, "2025-01-01", "2025-12-31"),
+                      rows, 1, needed=True)
+    stage('write_csv', lambda: generated.to_csv(csv_path, index=False), rows, 1, needed=True)
+    del generated
+    raw = stage('read_csv', lambda: read_sales_csv(csv_path), rows, needed=True)
+
+    # Typed, date-sorted frame (what load_sales_data(typed=True) builds)
+    df = stage('prepare', lambda: encode_ids(to_categorical(sort_by_date(parse_dates(raw.copy())))),
+               rows, needed=True)
+    del raw
+    df.attrs['fingerprint'] = f"suite:{rows}"
+
+    if HAS_PYARROW:
+        stage('cache_write', lambda: write_cache(df, cache_path, cache_path + ".json", "suite", os.stat(csv_path)), rows, 1)
+        if os.path.exists(cache_path):
+            stage('cache_read', lambda: read_cache(cache_path), rows)
+
+    stage('derive', lambda: select_columns(df, CUBE_MEASURES), rows)
+    bitmap_index = stage('bitmap_index', lambda: build_bitmap_index(df), rows)
+    scenarios = filter_scenarios(df)
+    for name, spec in zip(['filter_defaults', 'filter_narrow'], scenarios.values()):
+        stage(name, lambda: filter_frame(df, **spec, bitmap_index=bitmap_index), rows)
+    for name, spec in predicate_scenarios(df).items():
+        stage(name, lambda: filter_frame(df, **spec, bitmap_index=bitmap_index), rows)
+    needs_cube = any(name.startswith('page_') for name in stages) or 'figures' in stages
+    cube = stage('cube', lambda: build_cube(df), rows, needed=needs_cube)
+    product_revenue = stage('groupby', lambda: AggregationPlan(df).agg(
+        'product_name', {'line_revenue': 'sum', 'quantity': 'sum'}), rows)
+    if product_revenue is not None:
+        stage('top_k', lambda: top_k(product_revenue, 10, 'line_revenue'), len(product_revenue))
+    stage('sketches', lambda: build_distinct_sketches(df), rows, 1)
+
+    # Each page's aggregation set over the unfiltered rows, then the
+    # Overview's figures built from its tables
+    pages = page_aggregations(df, cube) if cube is not None else {}
+    for name, func in pages.items():
+        tables = stage(name, func, rows, needed=(name == 'page_overview' and HAS_PLOTLY and 'figures' in stages))
+        if name == 'page_overview' and HAS_PLOTLY and tables is not None:
+            stage('figures', lambda: build_figures(tables), len(tables['trend']))
+    return results
+
+def benchmark_suite(sizes, stages, repeat, output):
+    """Time every pipeline stage at each size and write the results (plus machine info) as JSON"""
+    print("\n⏱️ PIPELINE BENCHMARK SUITE")
+    print("-" * 60)
+    report = {'machine': machine_info(), 'repeat': repeat, 'results': []}
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in sizes:
+            print(f"\n{rows:,} rows")
+            for result in run_suite_size(rows, stages, repeat, workdir):
+                report['results'].append(result)
+                rate = f"{result['rows_per_second']:>14,.0f} rows/s" if result['rows_per_second'] else ""
+                print(f"  {result['stage']:20s} {result['seconds'] * 1000:11.1f} ms {rate}")
+            for name in os.listdir(workdir):
+                os.remove(os.path.join(workdir, name))
+
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"\n✅ Results saved: {output}\n")
+    return report
+
+# ============================================
+# DASHBOARD RENDER BENCHMARK
+# ============================================
+
+# Dataset sizes, reruns per page and filter setting, and the p95 rerun time
+# (ms) that no page may exceed
+RENDER_SIZES = [10_000, 100_000, 1_000_000]
+RENDER_REPEAT = 3
+RENDER_BUDGET_MS = 3000
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+def sidebar_widget(at, kind, label):
+    """The sidebar widget of one kind (e.g. 'multiselect') with the given label"""
+    return next(widget for widget in getattr(at.sidebar, kind) if widget.label == label)
+
+# Filter settings each page is rendered with (applied to a fresh session)
+RENDER_SCENARIOS = {
+    'defaults': lambda at: None,
+    'one_store': lambda at: sidebar_widget(at, 'multiselect', "Select Store(s):").set_value(
+        sidebar_widget(at, 'multiselect', "Select Store(s):").options[:1]),
+    'online': lambda at: sidebar_widget(at, 'selectbox', "Select Channel:").set_value("Online"),
+    'two_categories': lambda at: sidebar_widget(at, 'multiselect', "Select Category(ies):").set_value(
+        sidebar_widget(at, 'multiselect', "Select Category(ies):").options[:2]),
+    'last_30_days': lambda at: sidebar_widget(at, 'date_input', "From:").set_value(
+        sidebar_widget(at, 'date_input', "To:").value - timedelta(days=30))
+}
+
+def percentile_ms(seconds, q):
+    """q-th percentile of a list of durations, in milliseconds"""
+    return float(np.percentile(seconds, q)) * 1000
+
+def max_rss_bytes():
+    """Peak resident memory of this process so far (None where unavailable)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+def run_render_size(rows, scenarios, repeat, timeout, seed=42):
+    """
+    Render every dashboard page headlessly with AppTest at `rows` rows.
+    The data is generated into a temporary working directory, which the
+    app then loads (and caches) like a fresh deployment. Each filter
+    scenario starts from a new session; every page is rerun `repeat` times
+    (the first rerun after a filter change misses the filter cache, the
+    rest hit it). Peak memory is one extra rerun per page under tracemalloc
+    (Python and NumPy allocations; Arrow buffers are not traced).
+    Returns (one summary dict per page, the raw reruns).
+    """
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    runs = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        generate_transactions(rows, seed, "2025-01-01", "2025-12-31").to_csv(
+            os.path.join(workdir, SALES_FILE), index=False)
+        os.chdir(workdir)
+        try:
+            # Cold start: CSV read, Arrow cache, index, cube and sketches
+            start = time.perf_counter()
+            at = AppTest.from_file(APP_FILE, default_timeout=timeout).run()
+            cold_seconds = time.perf_counter() - start
+            pages = at.sidebar.radio[0].options
+
+            for scenario in scenarios:
+                at = AppTest.from_file(APP_FILE, default_timeout=timeout).run()
+                RENDER_SCENARIOS[scenario](at)
+                for page in pages:
+                    at.sidebar.radio[0].set_value(page)
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        at.run()
+                        runs.append({
+                            'rows': rows, 'page': page, 'scenario': scenario,
+                            'seconds': time.perf_counter() - start,
+                            'errors': [exception.message for exception in at.exception]
+                        })
+
+            peaks = {}
+            for page in pages:
+                at.sidebar.radio[0].set_value(page)
+                tracemalloc.start()
+                at.run()
+                peaks[page] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        finally:
+            os.chdir(cwd)
+
+    summaries = []
+    for page in pages:
+        page_runs = [run for run in runs if run['page'] == page]
+        seconds = [run['seconds'] for run in page_runs]
+        summaries.append({
+            'rows': rows, 'page': page, 'runs': len(seconds),
+            'p50_ms': percentile_ms(seconds, 50), 'p95_ms': percentile_ms(seconds, 95),
+            'max_ms': max(seconds) * 1000, 'peak_traced_bytes': peaks[page],
+            'cold_start_ms': cold_seconds * 1000,
+            'errors': sorted({error for run in page_runs for error in run['errors']})
+        })
+    return summaries, runs
+
+def benchmark_render(sizes, scenarios, repeat, budget_ms, timeout, output):
+    """
+    p50/p95 rerun time and peak memory of every dashboard page at each
+    size, saved as JSON. Returns False when a page raised or its p95
+    exceeded the budget.
+    """
+    print("\n🖥️ DASHBOARD RENDER BENCHMARK")
+    print("-" * 60)
+    report = {'machine': machine_info(), 'repeat': repeat, 'scenarios': scenarios,
+              'budget_p95_ms': budget_ms, 'pages': [], 'runs': []}
+    failures = []
+    for rows in sizes:
+        summaries, runs = run_render_size(rows, scenarios, repeat, timeout)
+        report['pages'].extend(summaries)
+        report['runs'].extend(runs)
+        print(f"\n{rows:,} rows (cold start {summaries[0]['cold_start_ms']:,.0f} ms)")
+        print(f"  {'page':32s} {'p50 ms':>9s} {'p95 ms':>9s} {'peak MB':>9s}")
+        for summary in summaries:
+            over_budget = budget_ms is not None and summary['p95_ms'] > budget_ms
+            flag = "❌" if over_budget or summary['errors'] else "✅"
+            print(f"  {summary['page']:32s} {summary['p50_ms']:9.1f} {summary['p95_ms']:9.1f} "
+                  f"{summary['peak_traced_bytes'] / 1024**2:9.1f} {flag}")
+            if over_budget:
+                failures.append(f"{summary['page']} at {rows:,} rows: p95 {summary['p95_ms']:.0f} ms > {budget_ms:.0f} ms")
+            for error in summary['errors']:
+                failures.append(f"{summary['page']} at {rows:,} rows raised: {error}")
+
+    report['max_rss_bytes'] = max_rss_bytes()
+    report['passed'] = not failures
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"\n✅ Results saved: {output}")
+
+    if failures:
+        print("\n❌ Latency budget / errors:")
+        for failure in failures:
+            print(f"  - {failure}")
+    else:
+        print(f"✅ Every page within the {budget_ms:.0f} ms p95 budget" if budget_ms is not None else "✅ No errors")
+    print()
+    return not failures
+
+# ============================================
+# LOAD_DATA MEMORY PROFILE
+# ============================================
+
+# How often resident memory is sampled while a load step runs
+RSS_SAMPLE_SECONDS = 0.005
+
+def current_rss_bytes():
+    """Resident memory of this process right now (Linux /proc; None elsewhere)"""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def peak_rss_during(func, interval=RSS_SAMPLE_SECONDS):
+    """Return (result, peak resident bytes while func ran), sampled from a background thread"""
+    samples = [current_rss_bytes()]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            samples.append(current_rss_bytes())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        result = func()
+    finally:
+        done.set()
+        sampler.join()
+    samples.append(current_rss_bytes())
+    samples = [value for value in samples if value is not None]
+    return result, (max(samples) if samples else None)
+
+def frame_bytes(df):
+    """Deep memory of a frame (index included)"""
+    return int(df.memory_usage(deep=True).sum())
+
+def profile_load_data(filename, workdir):
+    """
+    Run load_data()'s typed pipeline step by step and measure each step:
+    the bytes of the intermediate frame it leaves, the extra traced
+    (Python/NumPy) allocation peak and the resident memory before, at the
+    peak and after. The Arrow cache round trip is a step too. Step times
+    include the tracemalloc overhead. Returns the final frame and the steps.
+    """
+    steps = []
+
+    def step(name, func):
+        gc.collect()
+        rss_before = current_rss_bytes()
+        tracemalloc.start()
+        start = time.perf_counter()
+        result, rss_peak = peak_rss_during(func)
+        seconds = time.perf_counter() - start
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        steps.append({
+            'step': name, 'seconds': seconds,
+            'result_bytes': frame_bytes(result) if isinstance(result, pd.DataFrame) else
+                            len(result) if isinstance(result, bytes) else None,
+            'traced_peak_bytes': traced_peak,
+            'rss_before': rss_before, 'rss_peak': rss_peak, 'rss_after': current_rss_bytes()
+        })
+        return result
+
+    # build_sales_data(typed=True), one call at a time
+    df = step('read_csv', lambda: read_sales_csv(filename))
+    df = step('parse_dates', lambda: parse_dates(df))
+    df = step('sort_by_date', lambda: sort_by_date(df))
+    df.attrs['typed'] = True
+    df = step('to_categorical', lambda: to_categorical(df))
+    df = step('encode_ids', lambda: encode_ids(df))
+
+    # Warm start: the Arrow cache written on the first load and mapped later
+    if HAS_PYARROW:
+        cache_path = os.path.join(workdir, "profile.arrow")
+        step('cache_write', lambda: write_cache(df, cache_path, cache_path + ".json", "profile", os.stat(filename)))
+        cached = step('cache_read', lambda: read_cache(cache_path))
+        del cached
+
+    # load_data() is an st.cache_resource: later reruns reuse this frame
+    # as-is, with no copy or unpickling step
+    return df, steps
+
+def derived_column_bytes(df):
+    """Bytes each derived column would take if materialised on the whole frame"""
+    rows = []
+    for column in list(DERIVED_COLUMNS) + CALENDAR_COLUMNS:
+        values = derived_column(df, column)
+        rows.append({'column': column, 'dtype': str(values.dtype),
+                     'bytes': int(values.memory_usage(deep=True, index=False))})
+    for alias, source in DERIVED_ALIASES.items():
+        rows.append({'column': alias, 'dtype': f"view of {source}", 'bytes': 0})
+    return pd.DataFrame(rows).set_index('column')
+
+def cache_entry_bytes(df):
+    """
+    Size of each dashboard cache entry. The st.cache_resource objects are
+    held as built, so their pickled size is an estimate of what they keep
+    alive.
+    """
+    from urbanmart_filters import build_bitmap_index
+    entries = {
+        'st.cache_resource load_data()': lambda: df,
+        'st.cache_resource load_filter_index()': lambda: build_bitmap_index(df),
+        'st.cache_resource load_cube()': lambda: build_cube(df),
+        'st.cache_resource load_distinct_sketches()': lambda: build_distinct_sketches(df)
+    }
+    return pd.DataFrame(
+        [{'entry': name, 'pickled_bytes': len(pickle.dumps(build()))} for name, build in entries.items()]
+    ).set_index('entry')
+
+def profile_memory(filename, rows, output):
+    """
+    Memory profile of load_data() on `filename` (or on `rows` generated
+    rows): per column, per derived column, per load step, peak versus
+    steady-state resident memory and the cache entry sizes. Saved as JSON.
+    """
+    to_mb = lambda value: value / 1024**2 if value is not None else float('nan')
+    print("\n🧠 LOAD_DATA MEMORY PROFILE")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as workdir:
+        if rows is not None:
+            filename = os.path.join(workdir, SALES_FILE)
+            generate_transactions(rows, 42, "2025-01-01", "2025-12-31").to_csv(filename, index=False)
+        rss_start = current_rss_bytes()
+        df, steps = profile_load_data(filename, workdir)
+        gc.collect()
+        rss_steady = current_rss_bytes()
+
+    print(f"\n{filename if rows is None else f'{rows:,} generated rows'}: {len(df):,} rows, "
+          f"{frame_bytes(df) / 1024**2:,.1f} MB in memory\n")
+    print(f"  {'step':18s} {'ms':>9s} {'result MB':>10s} {'traced MB':>10s} {'RSS peak':>9s} {'RSS after':>10s}")
+    for record in steps:
+        print(f"  {record['step']:18s} {record['seconds'] * 1000:9.1f} {to_mb(record['result_bytes']):10.1f} "
+              f"{to_mb(record['traced_peak_bytes']):10.1f} {to_mb(record['rss_peak']):9.1f} {to_mb(record['rss_after']):10.1f}")
+
+    columns = memory_report(df)
+    derived = derived_column_bytes(df)
+    entries = cache_entry_bytes(df)
+    print("\n📦 Stored columns")
+    print(columns.to_string())
+    print("\n🧮 Derived columns (computed on demand; bytes if materialised on every row)")
+    print(derived.to_string())
+    print("\n🗄️ Cache entries")
+    print(entries.to_string())
+
+    peak_rss = max(record['rss_peak'] for record in steps if record['rss_peak'] is not None) if rss_start else None
+    print(f"\nResident memory: {to_mb(rss_start):,.1f} MB before, {to_mb(peak_rss):,.1f} MB peak, "
+          f"{to_mb(rss_steady):,.1f} MB steady (frame loaded, intermediates freed)")
+
+    report = {
+        'machine': machine_info(), 'source': filename if rows is None else f"generated:{rows}",
+        'rows': len(df), 'frame_bytes': frame_bytes(df),
+        'rss_start_bytes': rss_start, 'rss_peak_bytes': peak_rss, 'rss_steady_bytes': rss_steady,
+        'steps': steps,
+        'columns': columns.reset_index(names='column').to_dict(orient='records'),
+        'derived_columns': derived.reset_index().to_dict(orient='records'),
+        'cache_entries': entries.reset_index().to_dict(orient='records')
+    }
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2, default=int)
+    print(f"\n✅ Results saved: {output}\n")
+    return report
+
+# ============================================
+# MAIN EXECUTION
+# ============================================
+
+def main():
+    """Parse arguments and run the selected benchmark"""
+    parser = argparse.ArgumentParser(description="UrbanMart performance benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    filters_parser = subparsers.add_parser("filters", help="apply_filters: legacy chain vs single mask vs bitmaps")
+    filters_parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    filters_parser.add_argument("--repeat", type=int, default=3)
+
+    topk_parser = subparsers.add_parser("topk", help="top-N tables: full sort vs partial selection")
+    topk_parser.add_argument("--groups", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 5_000_000])
+    topk_parser.add_argument("--n", type=int, default=10)
+    topk_parser.add_argument("--repeat", type=int, default=3)
+
+    distinct_parser = subparsers.add_parser("distinct", help="distinct counts: exact nunique vs HyperLogLog")
+    distinct_parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    distinct_parser.add_argument("--repeat", type=int, default=3)
+
+    csv_parser = subparsers.add_parser("csv", help="pure-Python loaders: DictReader list vs compact arrays")
+    csv_parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    csv_parser.add_argument("--repeat", type=int, default=1)
+
+    suite_parser = subparsers.add_parser("suite", help="every pipeline stage at several sizes, saved as JSON")
+    suite_parser.add_argument("--rows", type=int, nargs="+", default=SUITE_SIZES)
+    suite_parser.add_argument("--stages", nargs="+", choices=SUITE_STAGES, default=SUITE_STAGES)
+    suite_parser.add_argument("--repeat", type=int, default=3)
+    suite_parser.add_argument("--output", default="benchmark_results.json")
+
+    render_parser = subparsers.add_parser("render", help="every dashboard page rendered headlessly (AppTest), with a latency budget")
+    render_parser.add_argument("--rows", type=int, nargs="+", default=RENDER_SIZES)
+    render_parser.add_argument("--scenarios", nargs="+", choices=list(RENDER_SCENARIOS), default=list(RENDER_SCENARIOS))
+    render_parser.add_argument("--repeat", type=int, default=RENDER_REPEAT)
+    render_parser.add_argument("--budget-ms", type=float, default=RENDER_BUDGET_MS,
+                               help="p95 rerun time allowed per page (0 disables the check)")
+    render_parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per rerun")
+    render_parser.add_argument("--output", default="render_results.json")
+
+    memory_parser = subparsers.add_parser("memory", help="load_data() memory: columns, derived columns, steps, RSS, cache entries")
+    memory_parser.add_argument("--file", default=SALES_FILE, help="sales CSV to profile")
+    memory_parser.add_argument("--rows", type=int, default=None, help="profile this many generated rows instead of --file")
+    memory_parser.add_argument("--output", default="memory_profile.json")
+
+    args = parser.parse_args()
+
+    if args.command == "filters":
+        benchmark_filters(args.rows, args.repeat)
+    elif args.command == "topk":
+        benchmark_top_k(args.groups, args.n, args.repeat)
+    elif args.command == "distinct":
+        benchmark_distinct(args.rows, args.repeat)
+    elif args.command == "csv":
+        benchmark_csv_loaders(args.rows, args.repeat)
+    elif args.command == "suite":
+        benchmark_suite(args.rows, args.stages, args.repeat, args.output)
+    elif args.command == "memory":
+        profile_memory(args.file, args.rows, args.output)
+    elif args.command == "render":
+        budget_ms = args.budget_ms or None
+        return 0 if benchmark_render(args.rows, args.scenarios, args.repeat, budget_ms, args.timeout, args.output) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,136 @@
+import csv
+import sys
+import heapq
+from array import array
+from itertools import islice
+
+# ============================================
+# COLUMN LAYOUT
+# ============================================
+
+# Numeric columns and their array.array typecodes; every other column is
+# dictionary-encoded (interned distinct values + an array of row codes)
+NUMERIC_COLUMNS = {
+    'quantity': 'l',
+    'unit_price': 'd',
+    'discount_applied': 'd'
+}
+
+# Rows parsed per batch before being transposed into the columns
+BATCH_ROWS = 10_000
+
+# ============================================
+# COMPACT COLUMNAR TABLE (STANDARD LIBRARY ONLY)
+# ============================================
+
+class DictionaryColumn:
+    """A string column stored as integer codes into a list of interned values"""
+
+    __slots__ = ('codes', 'values', 'lookup')
+
+    def __init__(self):
+        self.codes = array('l')
+        self.values = []
+        self.lookup = {}
+
+    def extend(self, values):
+        """Encode a batch of values"""
+        lookup = self.lookup
+        for value in dict.fromkeys(values):
+            if value not in lookup:
+                value = sys.intern(value)
+                lookup[value] = len(self.values)
+                self.values.append(value)
+        self.codes.extend(map(lookup.__getitem__, values))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def freeze(self):
+        """Drop the load-time lookup dict (only needed while appending)"""
+        self.lookup = None
+
+class CompactSales:
+    """
+    Parallel columns for the sales CSV: array.array for the numeric ones and
+    dictionary-encoded codes for the strings. A row costs a few dozen bytes
+    instead of a 15-entry dict of strings, and no pandas is required.
+    total(), revenue_by_store() and top_products() match the pandas KPIs.
+    """
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, fieldnames):
+        self.columns = {
+            name: array(NUMERIC_COLUMNS[name]) if name in NUMERIC_COLUMNS else DictionaryColumn()
+            for name in fieldnames
+        }
+        self.rows = 0
+
+    def extend(self, records):
+        """Append a batch of parsed CSV rows (lists in header order), column by column"""
+        if not records:
+            return
+        for column, values in zip(self.columns.values(), zip(*records)):
+            if isinstance(column, array):
+                column.extend(map(int if column.typecode == 'l' else float, values))
+            else:
+                column.extend(values)
+        self.rows += len(records)
+
+    def __len__(self):
+        return self.rows
+
+    def row(self, index):
+        """One row as a dict (for display)"""
+        return {name: column[index] for name, column in self.columns.items()}
+
+    def line_revenue(self):
+        """(quantity * unit_price) - discount_applied for every row"""
+        return array('d', map(
+            lambda q, p, d: q * p - d,
+            self.columns['quantity'], self.columns['unit_price'], self.columns['discount_applied']
+        ))
+
+    def _revenue_by(self, column):
+        """Revenue summed per value of a dictionary-encoded column"""
+        encoded = self.columns[column]
+        totals = [0.0] * len(encoded.values)
+        for code, revenue in zip(encoded.codes, self.line_revenue()):
+            totals[code] += revenue
+        return dict(sorted(zip(encoded.values, totals)))
+
+    def total(self):
+        """Same result as compute_total_revenue()"""
+        return round(sum(self.line_revenue()), 2)
+
+    def revenue_by_store(self):
+        """Same result as compute_revenue_by_store()"""
+        return {k: round(v, 2) for k, v in self._revenue_by('store_location').items()}
+
+    def top_products(self, n=5):
+        """Same result as compute_top_n_products() (ties keep name order)"""
+        totals = self._revenue_by('product_name')
+        return dict(heapq.nlargest(n, totals.items(), key=lambda item: item[1]))
+
+def load_compact(filename, batch_rows=BATCH_ROWS):
+    """
+    Read the sales CSV into a CompactSales table with the csv module.
+    Rows are parsed in batches, so at most batch_rows row lists are alive
+    at any time.
+    """
+    with open(filename, 'r', newline='') as file:
+        reader = csv.reader(file)
+        table = CompactSales(next(reader))
+        while True:
+            batch = [record for record in islice(reader, batch_rows) if record]
+            if not batch:
+                break
+            table.extend(batch)
+    for column in table.columns.values():
+        if isinstance(column, DictionaryColumn):
+            column.freeze()
+    return table
\ No newline at end of file
@@ -0,0 +1,436 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# ============================================
+# SETTINGS
+# ============================================
+
+SALES_FILE = "urbanmart_sales.csv"
+CACHE_DIR = ".urbanmart_cache"
+
+# Bump this whenever the derived columns change so old caches are rebuilt
+CACHE_VERSION = 7
+
+# Fixed category orders for the calendar dimensions
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_ORDER = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+# Low-cardinality dimensions stored as categoricals in typed mode
+CATEGORICAL_COLUMNS = [
+    'store_id', 'store_location', 'customer_segment', 'product_category',
+    'product_name', 'payment_method', 'channel',
+    'day_of_week', 'month_name', 'year_month', 'year_quarter'
+]
+
+# Per-row and per-bill IDs: only counted and grouped on, never displayed,
+# so they are stored as their number ('TXN-2025-0001' -> 1)
+NUMBERED_ID_COLUMNS = ['transaction_id', 'bill_id']
+
+# IDs shown in tables: stored as categoricals (integer codes plus the
+# original strings as the reverse dictionary) when that is smaller
+ID_COLUMNS = ['customer_id', 'product_id']
+
+# Assumed cost of goods sold, as a share of gross revenue
+COST_RATE = 0.30
+
+# Time components, broadcast from the calendar dimension on demand
+CALENDAR_COLUMNS = ['day_of_week', 'week', 'month', 'month_name', 'quarter', 'year', 'year_month', 'year_quarter']
+
+# Derived measures as expressions over the base columns; nothing is stored
+# in the loaded frame, each one is computed when a (filtered) frame needs it
+DERIVED_COLUMNS = {
+    'line_revenue': lambda df: (df['quantity'] * df['unit_price']) - df['discount_applied'],
+    'gross_revenue': lambda df: df['quantity'] * df['unit_price'],
+    'cost': lambda df: df['quantity'] * df['unit_price'] * COST_RATE,
+    'profit': lambda df: derived_column(df, 'line_revenue') - derived_column(df, 'cost'),
+    'profit_margin': lambda df: (derived_column(df, 'profit') / derived_column(df, 'line_revenue') * 100).round(2)
+}
+
+# Pure renames of a base column, served as views (no copy)
+DERIVED_ALIASES = {'total_discount': 'discount_applied'}
+
+# ============================================
+# CSV PARSING & DERIVED COLUMNS
+# ============================================
+
+def read_sales_csv(filename=SALES_FILE):
+    """Read the raw sales CSV"""
+    return pd.read_csv(filename)
+
+def build_calendar(dates):
+    """
+    Calendar dimension: one row per distinct date with every time component.
+    The slow per-value work (day names, strftime, periods) runs here, on
+    hundreds of days instead of millions of transactions.
+    """
+    calendar = pd.DataFrame({'date': pd.DatetimeIndex(dates)})
+    calendar['day_of_week'] = calendar['date'].dt.day_name()
+    calendar['week'] = calendar['date'].dt.isocalendar().week
+    calendar['month'] = calendar['date'].dt.month
+    calendar['month_name'] = calendar['date'].dt.strftime('%B')
+    calendar['quarter'] = calendar['date'].dt.quarter
+    calendar['year'] = calendar['date'].dt.year
+    calendar['year_month'] = calendar['date'].dt.to_period('M').astype(str)
+    calendar['year_quarter'] = calendar['date'].dt.to_period('Q').astype(str)
+    return calendar
+
+def calendar_columns(dates, columns=CALENDAR_COLUMNS, typed=False):
+    """
+    Time components for each row, broadcast from the calendar dimension by
+    date code. With typed=True the string components are emitted directly
+    as categoricals (codes are broadcast, never the strings).
+    """
+    date_codes, unique_dates = pd.factorize(dates, sort=True)
+    calendar = build_calendar(unique_dates)
+
+    result = {}
+    for column in columns:
+        values = calendar[column]
+        if typed and column in CATEGORICAL_COLUMNS:
+            categories = _category_order(column, values)
+            values = pd.Series(pd.Categorical(values, categories=categories, ordered=True))
+        result[column] = pd.Series(values.array.take(date_codes, allow_fill=True), index=dates.index, name=column)
+    return result
+
+def is_derived(column):
+    """True if the column comes from the derived-column registry"""
+    return column in DERIVED_COLUMNS or column in DERIVED_ALIASES or column in CALENDAR_COLUMNS
+
+def derived_column(df, column):
+    """
+    Return a column of df, computing it from the registry when it is not
+    stored. Nothing is added to df.
+    """
+    if column in df.columns:
+        return df[column]
+    if column in DERIVED_ALIASES:
+        return df[DERIVED_ALIASES[column]].rename(column)
+    if column in CALENDAR_COLUMNS:
+        return calendar_columns(df['date'], [column], df.attrs.get('typed', False))[column]
+    if column in DERIVED_COLUMNS:
+        return DERIVED_COLUMNS[column](df).rename(column)
+    raise KeyError(column)
+
+def ensure_columns(df, columns):
+    """
+    Materialise the missing derived columns on df (in place) and return it.
+    Use on a frame you own, e.g. a shallow copy of a filtered slice.
+    """
+    missing = [column for column in dict.fromkeys(columns) if column not in df.columns and is_derived(column)]
+    dates = [column for column in missing if column in CALENDAR_COLUMNS]
+    if dates:
+        for column, values in calendar_columns(df['date'], dates, df.attrs.get('typed', False)).items():
+            df[column] = values
+    for column in missing:
+        if column not in dates:
+            df[column] = derived_column(df, column)
+    return df
+
+def select_columns(df, columns):
+    """A new frame with just `columns`, computing derived ones (df is not modified)"""
+    selected = pd.DataFrame({column: derived_column(df, column) for column in columns}, index=df.index)
+    selected.attrs = dict(df.attrs)
+    return selected
+
+def parse_dates(df):
+    """Convert the date column to datetime"""
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def add_derived_columns(df, typed=False, columns=None):
+    """
+    Materialise revenue, profit and time columns (all of them by default).
+    The dashboard loader does not call this - it computes them lazily.
+    """
+    df = parse_dates(df)
+    df.attrs['typed'] = typed
+    if columns is None:
+        columns = list(DERIVED_COLUMNS) + list(DERIVED_ALIASES) + CALENDAR_COLUMNS
+    return ensure_columns(df, columns)
+
+# ============================================
+# TYPED (CATEGORICAL) LAYOUT
+# ============================================
+
+def _category_order(column, values):
+    """Return the fixed category list for a dimension column"""
+    if column == 'day_of_week':
+        return DAY_ORDER
+    if column == 'month_name':
+        return MONTH_ORDER
+    # 'YYYY-MM' and 'YYYYQn' sort chronologically as strings;
+    # the other dimensions are simply kept in alphabetical order
+    return sorted(values.dropna().unique().tolist())
+
+def to_categorical(df, columns=CATEGORICAL_COLUMNS):
+    """Encode the low-cardinality dimensions as ordered pandas categoricals"""
+    for column in columns:
+        if column not in df.columns:
+            continue
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            continue
+        categories = _category_order(column, df[column])
+        df[column] = pd.Categorical(df[column], categories=categories, ordered=True)
+    return df
+
+def parse_numbered_ids(values):
+    """
+    Split IDs of the form <prefix><number> (e.g. 'TXN-2025-0001') into
+    integers and the format that reverses them: returns (numbers, [prefix,
+    digits]) such that f"{prefix}{number:0{digits}d}" gives the original ID
+    back, or None when the column does not follow one such format.
+    """
+    values = values.astype(str)
+    if len(values) == 0 or values.isna().any():
+        return None
+    # Everything before the trailing digits of the first ID
+    prefix = re.sub(r'\d+$', '', values.iloc[0])
+    if not values.str.startswith(prefix).all():
+        return None
+    digits = values.str.slice(len(prefix))
+    if not digits.str.fullmatch(r'\d{1,18}').all():
+        return None
+    width = digits.str.len()
+    min_digits = int(width.min())
+    # Longer numbers must not be zero-padded, or two IDs could share a number
+    if not ((width == min_digits) | ~digits.str.startswith('0')).all():
+        return None
+    numbers = digits.astype('int64').to_numpy()
+    dtype = np.int32 if numbers.max() <= np.iinfo(np.int32).max else np.int64
+    return numbers.astype(dtype), [prefix, min_digits]
+
+def encode_ids(df, columns=ID_COLUMNS, numbered=NUMBERED_ID_COLUMNS):
+    """
+    Replace string IDs with compact integer keys.
+    Numbered IDs (transaction_id, bill_id) become plain int32/int64 columns
+    holding the number in the ID; the prefix and zero-padding that turn them
+    back into the original strings are kept in df.attrs['id_formats'], so
+    nunique and groupby run on integers with no per-ID dictionary. IDs that
+    do not follow one <prefix><number> format are treated like `columns`.
+    The other IDs become categoricals (integer codes, with the original
+    strings as the reverse dictionary, so tables still display them) when
+    that makes them smaller.
+    """
+    id_formats = dict(df.attrs.get('id_formats', {}))
+    for column in list(numbered) + list(columns):
+        if column not in df.columns or column in id_formats:
+            continue
+        if not pd.api.types.is_string_dtype(df[column].dtype) or isinstance(df[column].dtype, pd.CategoricalDtype):
+            continue
+        parsed = parse_numbered_ids(df[column]) if column in numbered else None
+        if parsed is not None:
+            df[column], id_formats[column] = parsed
+            continue
+        codes, uniques = pd.factorize(df[column], sort=True)
+        encoded = pd.Categorical.from_codes(codes, categories=uniques)
+        if encoded.memory_usage(deep=True) < df[column].memory_usage(deep=True, index=False):
+            df[column] = encoded
+    if id_formats:
+        df.attrs['id_formats'] = id_formats
+    return df
+
+def memory_report(df, compare_to=None):
+    """
+    Return a per-column memory table (deep bytes).
+    When compare_to is given, both layouts are listed side by side.
+    """
+    report = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'bytes': df.memory_usage(deep=True, index=False)
+    })
+    if compare_to is not None:
+        other = compare_to.memory_usage(deep=True, index=False)
+        report['compare_dtype'] = compare_to.dtypes.astype(str).reindex(report.index)
+        report['compare_bytes'] = other.reindex(report.index)
+        report['ratio'] = (report['compare_bytes'] / report['bytes']).round(2)
+    totals = report.drop(columns=[c for c in ('dtype', 'compare_dtype') if c in report]).sum()
+    if compare_to is not None:
+        totals['ratio'] = round(totals['compare_bytes'] / totals['bytes'], 2)
+    report.loc['TOTAL'] = totals
+    report = report.fillna({'dtype': '', 'compare_dtype': ''})
+    byte_columns = [c for c in ('bytes', 'compare_bytes') if c in report]
+    report[byte_columns] = report[byte_columns].astype('int64')
+    return report
+
+def print_memory_report(filename=SALES_FILE):
+    """Print the memory footprint of the typed layout versus the object layout"""
+    # Calendar columns are derived on demand in the dashboard; materialise
+    # them here so both layouts of the day/month/period dimensions are shown
+    object_df = add_derived_columns(load_sales_data(filename, use_cache=False), columns=CALENDAR_COLUMNS)
+    typed_df = encode_ids(to_categorical(object_df.copy()))
+    report = memory_report(typed_df, compare_to=object_df)
+
+    print("\n🧠 MEMORY FOOTPRINT (typed vs object layout)")
+    print("-" * 60)
+    print(report.rename(columns={
+        'dtype': 'typed dtype', 'bytes': 'typed bytes',
+        'compare_dtype': 'object dtype', 'compare_bytes': 'object bytes',
+        'ratio': 'x smaller'
+    }).to_string())
+    print()
+    return report
+
+# ============================================
+# COLUMNAR CACHE
+# ============================================
+
+def fingerprint_file(filename, chunk_size=1 << 20):
+    """Return a content hash of a file (plus the cache version)"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{CACHE_VERSION}".encode())
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _cache_paths(filename, cache_dir, typed=False):
+    """Return the (data, metadata) cache paths for a source file"""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    if typed:
+        stem += ".typed"
+    return (
+        os.path.join(cache_dir, f"{stem}.arrow"),
+        os.path.join(cache_dir, f"{stem}.meta.json")
+    )
+
+def _read_cache_meta(meta_path):
+    """Read cache metadata, or None if it is missing or unreadable"""
+    try:
+        with open(meta_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def source_fingerprint(filename, meta=None):
+    """
+    Fingerprint the source file.
+    The full content hash is only recomputed when size/mtime differ from
+    what the cache metadata recorded.
+    """
+    stat = os.stat(filename)
+    if (meta is not None
+            and meta.get('version') == CACHE_VERSION
+            and meta.get('size') == stat.st_size
+            and meta.get('mtime_ns') == stat.st_mtime_ns):
+        return meta['fingerprint'], stat
+    return fingerprint_file(filename), stat
+
+def read_cache(data_path):
+    """
+    Read the Arrow cache file and return it as a DataFrame.
+    The file is memory-mapped, so it is read without an intermediate
+    buffer, but to_pandas() copies the numeric and categorical columns
+    into pandas memory; only Arrow-backed string columns keep pointing
+    at the mapped file.
+    """
+    table = feather.read_table(data_path, memory_map=True)
+    return table.to_pandas()
+
+def _replace_with(path, write):
+    """
+    Call write(tmp_path) on a temp file of its own next to path, then
+    atomically replace path with it. Each writer (e.g. replicas on one host
+    cold-starting together) gets a unique temp file, so a replaced file is
+    never a mix of two writes.
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory or ".")
+    os.close(fd)
+    try:
+        os.chmod(tmp_path, 0o644)  # mkstemp files are private; cache files are not
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def write_cache(df, data_path, meta_path, fingerprint, stat):
+    """Write the enriched frame as an uncompressed Arrow file (atomic replace)"""
+    os.makedirs(os.path.dirname(data_path) or ".", exist_ok=True)
+
+    # Uncompressed so later loads read the columns without a decompression pass
+    _replace_with(data_path, lambda tmp_path: feather.write_feather(df, tmp_path, compression="uncompressed"))
+
+    meta = {
+        'version': CACHE_VERSION,
+        'fingerprint': fingerprint,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'rows': len(df)
+    }
+    def write_meta(tmp_path):
+        with open(tmp_path, 'w') as file:
+            json.dump(meta, file)
+    _replace_with(meta_path, write_meta)
+
+def sort_by_date(df):
+    """Order rows by date (stable) so date ranges are contiguous row slices"""
+    return df.sort_values('date', kind='stable', ignore_index=True)
+
+def build_sales_data(filename=SALES_FILE, typed=False):
+    """
+    Parse the CSV and build the date-sorted frame (no caching).
+    Only the base columns are stored; derived columns are served on access
+    through derived_column() / ensure_columns() / select_columns().
+    """
+    df = sort_by_date(parse_dates(read_sales_csv(filename)))
+    df.attrs['typed'] = typed
+    if typed:
+        df = encode_ids(to_categorical(df))
+    return df
+
+def load_sales_data(filename=SALES_FILE, cache_dir=CACHE_DIR, use_cache=True, typed=False):
+    """
+    Load the sales data (base columns only - see build_sales_data()).
+    With pyarrow installed, the first load writes an Arrow cache to
+    cache_dir and later loads read it until the CSV content changes.
+    typed=True stores the dimension columns as categoricals and the IDs as
+    integers (see encode_ids(); typed data has its own cache file). The source fingerprint is kept in
+    df.attrs['fingerprint'] so result caches can tell datasets apart.
+    """
+    if not (use_cache and HAS_PYARROW):
+        df = build_sales_data(filename, typed)
+        df.attrs['fingerprint'] = fingerprint_file(filename)
+        return df
+
+    data_path, meta_path = _cache_paths(filename, cache_dir, typed)
+    meta = _read_cache_meta(meta_path)
+    fingerprint, stat = source_fingerprint(filename, meta)
+
+    if meta is not None and meta.get('fingerprint') == fingerprint and os.path.exists(data_path):
+        try:
+            df = read_cache(data_path)
+            df.attrs['typed'] = typed
+            df.attrs['fingerprint'] = fingerprint
+            return df
+        except (OSError, pa.ArrowException):
+            pass  # Corrupt or partial cache - rebuild below
+
+    df = build_sales_data(filename, typed)
+    df.attrs['fingerprint'] = fingerprint
+
+    try:
+        write_cache(df, data_path, meta_path, fingerprint, stat)
+    except (OSError, pa.ArrowException):
+        pass  # Read-only location - still serve the freshly built frame
+
+    return df
+
+if __name__ == "__main__":
+    print_memory_report()
\ No newline at end of file
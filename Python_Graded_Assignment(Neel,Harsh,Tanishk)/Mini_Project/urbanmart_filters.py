@@ -0,0 +1,389 @@
+import weakref
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# ============================================
+# FILTER DIMENSIONS
+# ============================================
+
+# Sidebar filter name -> column it restricts
+FILTER_COLUMNS = {
+    'stores': 'store_location',
+    'categories': 'product_category',
+    'segments': 'customer_segment',
+    'payment_methods': 'payment_method'
+}
+
+# ============================================
+# MASK BUILDING
+# ============================================
+
+def _distinct_values(column, bitmap_index=None):
+    """
+    The column's non-missing values: the bitmap keys when an index is given,
+    the categories of a categorical, otherwise the distinct values.
+    """
+    if (bitmap_index is not None and bitmap_index['rows'] == len(column)
+            and column.name in bitmap_index['bitmaps']):
+        return bitmap_index['bitmaps'][column.name].keys()
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.categories
+    return column.dropna().unique()
+
+def _is_unrestricted(column, values, bitmap_index=None):
+    """True when a selection keeps every row (empty or every value selected)"""
+    if not values:
+        return True
+    return set(_distinct_values(column, bitmap_index)).issubset(values)
+
+def column_mask(column, values):
+    """Boolean NumPy mask of rows whose value is in values"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Lookup table over the category codes - no string comparisons.
+        # The extra last slot maps code -1 (missing) to False.
+        categories = column.cat.categories
+        lookup = np.zeros(len(categories) + 1, dtype=bool)
+        lookup[categories.get_indexer(list(values))] = True
+        lookup[-1] = False
+        return lookup[column.cat.codes.to_numpy()]
+    return column.isin(values).to_numpy()
+
+def _as_date_scalar(value, dtype):
+    """Convert a date-like value to a datetime64 scalar in the column's unit"""
+    # Matching the unit avoids NumPy casting the whole column for the comparison
+    return np.datetime64(pd.Timestamp(value)).astype(dtype)
+
+def date_mask(dates, start, end):
+    """Boolean NumPy mask of rows with start <= date <= end"""
+    values = dates.to_numpy()
+    mask = values >= _as_date_scalar(start, values.dtype)
+    mask &= values <= _as_date_scalar(end, values.dtype)
+    return mask
+
+def restricted_columns(df, stores=None, channel="All",
+                       categories=None, segments=None, payment_methods=None, bitmap_index=None):
+    """
+    Map each column that is actually restricted to its selected values.
+    Selections that keep every value are left out (the values are read
+    from the bitmap index when one is given).
+    """
+    selections = {
+        'stores': stores,
+        'categories': categories,
+        'segments': segments,
+        'payment_methods': payment_methods
+    }
+    restrictions = {}
+    for name, values in selections.items():
+        column = FILTER_COLUMNS[name]
+        if not _is_unrestricted(df[column], values, bitmap_index):
+            restrictions[column] = list(values)
+
+    if channel != "All":
+        restrictions['channel'] = [channel]
+
+    return restrictions
+
+# ============================================
+# DATE-SORTED RANGE SLICING
+# ============================================
+
+def is_date_sorted(df):
+    """
+    True when rows are in ascending date order.
+    Checked on the column every time (one linear pass, no mask): a flag in
+    df.attrs would be copied onto shuffled or re-sorted derived frames.
+    """
+    return df['date'].is_monotonic_increasing
+
+def date_slice(dates, start, end):
+    """
+    Row slice covering start <= date <= end on a date-sorted column.
+    Two binary searches - O(log n), no mask over the whole column.
+    """
+    values = dates.to_numpy()
+    low = values.searchsorted(_as_date_scalar(start, values.dtype), side='left')
+    high = values.searchsorted(_as_date_scalar(end, values.dtype), side='right')
+    return slice(int(low), int(high))
+
+# ============================================
+# BITMAP INDEXES
+# ============================================
+
+# Dimensions that get a bitmap index (sidebar multiselects + channel)
+BITMAP_COLUMNS = ['store_location', 'product_category', 'customer_segment', 'payment_method', 'channel']
+
+def _pack_mask(mask):
+    """Pack a boolean mask into uint64 words (bit i = row i)"""
+    packed = np.packbits(mask, bitorder='little')
+    padding = (-len(packed)) % 8
+    if padding:
+        packed = np.concatenate([packed, np.zeros(padding, dtype=np.uint8)])
+    return packed.view(np.uint64)
+
+def _popcount(words):
+    """Number of set bits in an array of uint64 words"""
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(words).sum())
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+def build_bitmap_index(df, columns=BITMAP_COLUMNS):
+    """
+    Build one packed bitset per distinct value per dimension.
+    Returns {'rows': n, 'bitmaps': {column: {value: uint64 words}}}.
+    """
+    bitmaps = {}
+    for column in columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            values = series.cat.categories
+        else:
+            codes, values = pd.factorize(series)
+        bitmaps[column] = {
+            value: _pack_mask(codes == code)
+            for code, value in enumerate(values)
+        }
+    return {'rows': len(df), 'bitmaps': bitmaps}
+
+def bitmap_select(bitmap_index, restrictions):
+    """
+    OR the bitsets within each restricted dimension, AND across dimensions.
+    Returns the combined uint64 words, or None when nothing is restricted.
+    """
+    words = -(-bitmap_index['rows'] // 64)
+    result = None
+    for column, values in restrictions.items():
+        bitmaps = bitmap_index['bitmaps'][column]
+        any_of = np.zeros(words, dtype=np.uint64)
+        for value in values:
+            if value in bitmaps:
+                any_of |= bitmaps[value]
+        if result is None:
+            result = any_of
+        else:
+            result &= any_of
+    return result
+
+def bitmap_to_mask(bits, rows):
+    """Unpack the bits for a row slice into a boolean mask"""
+    as_bytes = bits.view(np.uint8)
+    first = rows.start // 8
+    last = -(-rows.stop // 8)
+    unpacked = np.unpackbits(as_bytes[first:last], bitorder='little').view(bool)
+    offset = rows.start - first * 8
+    return unpacked[offset:offset + rows.stop - rows.start]
+
+def bitmap_count(bits, rows):
+    """Count set bits inside a row slice - popcount on the whole words in between"""
+    first_word = -(-rows.start // 64)
+    last_word = rows.stop // 64
+    if first_word >= last_word:
+        return int(bitmap_to_mask(bits, rows).sum())
+    count = _popcount(bits[first_word:last_word])
+    count += int(bitmap_to_mask(bits, slice(rows.start, first_word * 64)).sum())
+    count += int(bitmap_to_mask(bits, slice(last_word * 64, rows.stop)).sum())
+    return count
+
+# ============================================
+# FILTER ENGINE
+# ============================================
+
+def _selection(df, start, end, restrictions, bitmap_index=None):
+    """
+    Resolve the filters to (row slice, mask over that slice).
+    The mask is None when every row in the slice is kept.
+    """
+    if bitmap_index is not None and bitmap_index['rows'] != len(df):
+        raise ValueError("bitmap index was built for a different frame")
+
+    if is_date_sorted(df):
+        rows = date_slice(df['date'], start, end)
+        mask = None
+    else:
+        rows = slice(0, len(df))
+        mask = date_mask(df['date'], start, end)
+
+    if restrictions:
+        if bitmap_index is not None:
+            bits = bitmap_select(bitmap_index, restrictions)
+            selected = bitmap_to_mask(bits, rows)
+        else:
+            part = df.iloc[rows]
+            selected = None
+            for column, values in restrictions.items():
+                column_selected = column_mask(part[column], values)
+                selected = column_selected if selected is None else selected & column_selected
+        mask = selected if mask is None else mask & selected
+
+    return rows, mask
+
+def select_rows(df, start, end, restrictions, bitmap_index=None):
+    """
+    Resolve the filters to the kept rows: a slice when they are contiguous,
+    otherwise a compact array of row positions.
+    """
+    rows, mask = _selection(df, start, end, restrictions, bitmap_index)
+    if mask is None:
+        return rows
+    if mask.all():
+        return rows
+    dtype = np.int32 if len(df) < 2 ** 31 else np.int64
+    return (np.flatnonzero(mask) + rows.start).astype(dtype, copy=False)
+
+def take_rows(df, rows):
+    """Materialise the rows returned by select_rows (no copy for the full range)"""
+    if isinstance(rows, slice):
+        if rows.start == 0 and rows.stop >= len(df):
+            return df
+        return df.iloc[rows]
+    return df.take(rows)
+
+def count_rows(df, start, end, stores=None, channel="All",
+               categories=None, segments=None, payment_methods=None, bitmap_index=None):
+    """
+    Number of rows that pass every filter, without materialising them.
+    With a bitmap index on a date-sorted frame this is a popcount.
+    """
+    restrictions = restricted_columns(df, stores, channel, categories, segments, payment_methods, bitmap_index)
+    if bitmap_index is not None and is_date_sorted(df):
+        rows = date_slice(df['date'], start, end)
+        if not restrictions:
+            return rows.stop - rows.start
+        return bitmap_count(bitmap_select(bitmap_index, restrictions), rows)
+
+    rows, mask = _selection(df, start, end, restrictions, bitmap_index)
+    if mask is None:
+        return rows.stop - rows.start
+    return int(mask.sum())
+
+def filter_frame(df, start, end, stores=None, channel="All",
+                 categories=None, segments=None, payment_methods=None, bitmap_index=None):
+    """
+    Return the filtered DataFrame, materialised once.
+    On a date-sorted frame the date range is a plain row slice and the other
+    predicates are only evaluated inside it (from bitmaps when an index is
+    given). When no row is removed the original frame is returned as-is
+    (no copy), so callers must treat the result as read-only.
+    """
+    restrictions = restricted_columns(df, stores, channel, categories, segments, payment_methods, bitmap_index)
+    rows, mask = _selection(df, start, end, restrictions, bitmap_index)
+
+    if rows.start > 0 or rows.stop < len(df):
+        df = df.iloc[rows]
+    if mask is None or mask.all():
+        return df
+    return df[mask]
+
+# ============================================
+# FILTER RESULT CACHE
+# ============================================
+
+def filter_key(df, start, end, restrictions):
+    """
+    Canonical cache key for a filter state.
+    Unrestricted selections are already dropped from restrictions, so
+    "everything selected" and "nothing selected" give the same key; on a
+    date-sorted frame the date range is keyed by the row slice it covers.
+    """
+    if is_date_sorted(df):
+        rows = date_slice(df['date'], start, end)
+        dates = (rows.start, rows.stop)
+    else:
+        dates = (pd.Timestamp(start), pd.Timestamp(end))
+    selections = tuple(
+        (column, tuple(sorted(set(values))))
+        for column, values in sorted(restrictions.items())
+    )
+    return (dates, selections)
+
+def _rows_nbytes(rows):
+    """Memory held by a cached selection"""
+    return 0 if isinstance(rows, slice) else rows.nbytes
+
+class FilterCache:
+    """
+    Bounded LRU cache of filter results.
+    Entries hold row positions (or a slice), never DataFrame copies, and are
+    evicted by count and by total bytes.
+    Safe to share between threads (Streamlit sessions): lookups, evictions
+    and clear() run under one lock, so the byte bound and the counters stay
+    consistent.
+    """
+
+    def __init__(self, max_entries=64, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.dataset = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def _check_dataset(self, df):
+        """
+        Start over when a different frame is filtered. Entries are row
+        positions, so they belong to the frame object itself: a fingerprint
+        in df.attrs is also copied onto shuffled or re-sorted frames.
+        """
+        if self.dataset is None or self.dataset() is not df:
+            self.clear()
+            self.dataset = weakref.ref(df)
+
+    def _evict(self):
+        """Drop least recently used entries until within both limits"""
+        with self.lock:
+            while self.entries and (len(self.entries) > self.max_entries or self.nbytes > self.max_bytes):
+                _, rows = self.entries.popitem(last=False)
+                self.nbytes -= _rows_nbytes(rows)
+                self.evictions += 1
+
+    def rows(self, df, start, end, stores=None, channel="All",
+             categories=None, segments=None, payment_methods=None, bitmap_index=None):
+        """Return the kept rows (slice or positions), computing them on a miss"""
+        restrictions = restricted_columns(df, stores, channel, categories, segments, payment_methods, bitmap_index)
+        key = filter_key(df, start, end, restrictions)
+
+        with self.lock:
+            self._check_dataset(df)
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+            self.misses += 1
+            rows = select_rows(df, start, end, restrictions, bitmap_index)
+            self.entries[key] = rows
+            self.nbytes += _rows_nbytes(rows)
+            self._evict()
+            return rows
+
+    def filter_frame(self, df, start, end, stores=None, channel="All",
+                     categories=None, segments=None, payment_methods=None, bitmap_index=None):
+        """Cached equivalent of filter_frame()"""
+        rows = self.rows(df, start, end, stores, channel,
+                         categories, segments, payment_methods, bitmap_index)
+        return take_rows(df, rows)
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.nbytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
\ No newline at end of file
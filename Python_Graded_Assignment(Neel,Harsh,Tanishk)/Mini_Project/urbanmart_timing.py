@@ -0,0 +1,116 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# ============================================
+# SETTINGS
+# ============================================
+
+# JSON-lines file the dashboard appends each instrumented render to
+TIMING_LOG = "urbanmart_timings.log"
+
+# ============================================
+# SECTION TIMER
+# ============================================
+
+class SectionTimer:
+    """
+    Wall time and rows in/out of the named sections of one render.
+    Use `with timer.section(name, rows_in) as record:` and set
+    record['rows_out'] inside the block, or start()/stop() for sections
+    that do not fit in a with block (e.g. a whole page). Inside a page,
+    block() marks where each chart or table starts; its construction and
+    its rendering (wrapped in render()) are recorded as separate sections.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.created = time.perf_counter()
+        self.current_block = None
+        self.current_render = None
+
+    def start(self, name, rows_in=None):
+        """Open a section and return its record"""
+        record = {'section': name, 'rows_in': rows_in, 'rows_out': None, 'ms': None,
+                  '_start': time.perf_counter()}
+        self.records.append(record)
+        return record
+
+    def stop(self, record, rows_out=None):
+        """Close a section opened with start()"""
+        record['ms'] = (time.perf_counter() - record.pop('_start')) * 1000 - record.pop('_paused', 0.0)
+        if rows_out is not None:
+            record['rows_out'] = rows_out
+        return record
+
+    @contextmanager
+    def section(self, name, rows_in=None):
+        """Time the with block as one section"""
+        record = self.start(name, rows_in)
+        try:
+            yield record
+        finally:
+            self.stop(record)
+
+    def block(self, name, rows_in=None):
+        """Close the current block and open '<name> · build'"""
+        self.end_block()
+        self.current_block = self.start(f"{name} · build", rows_in)
+        self.current_block['_paused'] = 0.0
+        self.current_block['_name'] = name
+        return self.current_block
+
+    def end_block(self):
+        """Close the current block, if any"""
+        if self.current_block is not None:
+            self.current_block.pop('_name')
+            self.stop(self.current_block)
+        self.current_block = None
+        self.current_render = None
+
+    @contextmanager
+    def render(self):
+        """Time the with block as the current block's '<name> · render', outside its build time"""
+        block = self.current_block
+        if block is not None and self.current_render is None:
+            self.current_render = {'section': f"{block['_name']} · render", 'rows_in': None,
+                                   'rows_out': None, 'ms': 0.0}
+            self.records.append(self.current_render)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if block is not None:
+                elapsed = (time.perf_counter() - started) * 1000
+                block['_paused'] += elapsed
+                self.current_render['ms'] += elapsed
+
+    def total_ms(self):
+        """Wall time since the timer was created"""
+        return (time.perf_counter() - self.created) * 1000
+
+    def to_frame(self):
+        """The finished sections as a table"""
+        finished = [record for record in self.records if record['ms'] is not None]
+        return pd.DataFrame(finished, columns=['section', 'ms', 'rows_in', 'rows_out'])
+
+def log_timings(timer, context=None, path=TIMING_LOG):
+    """Append one JSON line with the render's sections (and e.g. the page) to the log file"""
+    entry = {
+        'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+        'total_ms': round(timer.total_ms(), 3),
+        **(context or {}),
+        'sections': [
+            {key: (round(value, 3) if key == 'ms' else value) for key, value in record.items()}
+            for record in timer.records if record['ms'] is not None
+        ]
+    }
+    try:
+        with open(path, 'a') as file:
+            file.write(json.dumps(entry, default=str) + "\n")
+    except OSError:
+        pass  # Read-only location - the panel still shows the timings
+    return entry
\ No newline at end of file